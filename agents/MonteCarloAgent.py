@@ -1,46 +1,103 @@
 import numpy as np
+import time
+from agents.checkpoint import save_checkpoint, load_checkpoint
+from agents.random_stream import RandomStream, make_rng
 
 class MonteCarloAgent:
-    def __init__(self, env, gamma=0.9):
+    def __init__(self, env, gamma=0.9, visit="every", rng=None):
+        # visit: "first" (first-visit MC) ou "every" (every-visit MC)
+        if visit not in ("first", "every"):
+            raise ValueError(f"Unknown visit mode: {visit}")
         self.env = env
         self.gamma = gamma
-        self.Q = np.zeros((env.size, env.size, env.action_space.n))
-        self.returns_count = np.zeros((env.size, env.size, env.action_space.n))
+        self.visit = visit
+        # rng: graine ou np.random.Generator propre à l'agent (pas d'état global)
+        self.rng = make_rng(rng)
+        self._random = RandomStream(self.rng, env.action_space.n)
+        # Mode flat_states: tables (S, A) indexées directement par l'entier d'état
+        self.Q = np.zeros(env.table_shape() + (env.action_space.n,))
+        self.returns_count = np.zeros(env.table_shape() + (env.action_space.n,))
+
+        # Buffers d'épisode préalloués (états à plat s = y * size + x)
+        self._states = np.zeros(env.max_steps, dtype=np.int64)
+        self._actions = np.zeros(env.max_steps, dtype=np.int64)
+        self._rewards = np.zeros(env.max_steps)
+        self._returns = np.zeros(env.max_steps)
 
     def generate_episode(self):
-        episode = []
+        """Joue un épisode aléatoire; renvoie des vues (states, actions, rewards) de longueur T"""
         state = self.env.reset()
+        flat = self.env.flat_states
         done = False
+        t = 0
         while not done:
-            action = np.random.choice(self.env.action_space.n)
+            action = self._random.action()
             next_state, reward, done, _ = self.env.step(action)
-            episode.append((state, action, reward))
+            self._states[t] = state if flat else state[1] * self.env.size + state[0]
+            self._actions[t] = action
+            self._rewards[t] = reward
             state = next_state
-        return episode
+            t += 1
+        return self._states[:t], self._actions[:t], self._rewards[:t]
 
-    def train(self, episodes=1000):
+    def train(self, episodes=1000, callback=None, callback_every=1):
         errors = []
-        policy = np.zeros((self.env.size, self.env.size))
-        
-        for _ in range(episodes):
-            episode = self.generate_episode()
+        n_actions = self.env.action_space.n
+        Q = self.Q.reshape(-1, n_actions)  # vue à plat
+        policy = np.zeros(Q.shape[0], dtype=int)
+        start = time.time()
+
+        for episode in range(episodes):
+            states, actions, rewards = self.generate_episode()
+            T = len(states)
+
+            # Un seul parcours à l'envers pour les retours G_t
+            returns = self._returns[:T]
             G = 0
-            
-            for state, action, reward in reversed(episode):
-                G = self.gamma * G + reward
-                y, x = state[1], state[0]
-                self.Q[y, x, action] += G
-                self.returns_count[y, x, action] += 1
-            
-            # Calcul de l’erreur / convergence
-            current_policy = np.argmax(self.Q / np.maximum(1, self.returns_count), axis=2)
-            error = np.mean(np.abs(current_policy - policy))
-            errors.append(error)
-            policy = current_policy.copy()
-        
-        return policy, errors
+            for t in range(T - 1, -1, -1):
+                G = self.gamma * G + rewards[t]
+                returns[t] = G
+
+            self.update_from_returns(states, actions, returns)
+
+            # Calcul de l’erreur / convergence: seuls les états visités changent
+            touched = np.unique(states)
+            current_policy = np.argmax(Q[touched], axis=1)
+            errors.append(np.sum(np.abs(current_policy - policy[touched])) / len(policy))
+            policy[touched] = current_policy
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, errors[-1], time.time() - start) is False:
+                    break
+
+        return policy.reshape(self.Q.shape[:-1]), errors
+
+    def update_from_returns(self, states, actions, returns, episode_ids=None):
+        """Moyenne incrémentale de Q à partir des retours d'un ou plusieurs épisodes.
+
+        states (états à plat), actions, returns: tableaux de même longueur.
+        episode_ids: identifiant d'épisode par pas, requis en first-visit si
+        plusieurs épisodes sont concaténés.
+        """
+        n_actions = self.env.action_space.n
+        Q_flat = self.Q.reshape(-1)
+        counts = self.returns_count.reshape(-1)
+        pairs = states * n_actions + actions
+        if self.visit == "first":
+            # Indice de première occurrence de chaque (s, a) dans son épisode
+            keys = pairs if episode_ids is None else episode_ids * Q_flat.size + pairs
+            _, first = np.unique(keys, return_index=True)
+            pairs, returns = pairs[first], returns[first]
+
+        pairs, inverse, k = np.unique(pairs, return_inverse=True, return_counts=True)
+        G_sum = np.bincount(inverse, weights=returns)
+        # Moyenne incrémentale: Q += (somme G - k * Q) / n
+        counts[pairs] += k
+        Q_flat[pairs] += (G_sum - k * Q_flat[pairs]) / counts[pairs]
 
     def choose_action(self, state):
+        if self.env.flat_states:
+            return self.Q[state].argmax()
         y, x = state[1], state[0]
         return np.argmax(self.Q[y, x])
 
@@ -50,3 +107,10 @@ class MonteCarloAgent:
 
     def load_table(self, filename="montecarlo_Q.npy"):
         self.Q = np.load(filename)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
@@ -1,41 +1,91 @@
 import numpy as np
+import time
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+from agents.checkpoint import save_checkpoint, load_checkpoint
+from agents.random_stream import make_rng
+
+def solve_policy_values(policy, next_states, rewards, gamma, free=None):
+    """Évaluation exacte de V_pi pour une politique déterministe.
+
+    Résout le système creux (I - gamma * P_pi) V = R_pi, où P_pi a un seul
+    coefficient par ligne. `free` (S,) optionnel restreint le système aux
+    états hors obstacles (aucune transition n'entre dans un obstacle).
+    Retourne (états résolus, valeurs).
+    """
+    n_states = next_states.shape[0]
+    states = np.arange(n_states) if free is None else np.flatnonzero(free)
+    actions = policy[states]
+    # Renuméroter les successeurs dans le sous-système
+    index = np.full(n_states, -1)
+    index[states] = np.arange(states.size)
+    rows = np.arange(states.size)
+    cols = index[next_states[states, actions]]
+    P_pi = sparse.csr_matrix((np.ones(states.size), (rows, cols)), shape=(states.size, states.size))
+    A = sparse.identity(states.size, format="csr") - gamma * P_pi
+    return states, spsolve(A.tocsc(), rewards[states, actions])
 
 class PolicyIterationAgent:
-    def __init__(self, env, gamma=0.9):
+    def __init__(self, env, gamma=0.9, evaluation="sweep", k=10, rng=None):
+        # evaluation: "sweep" (un balayage par itération), "exact" (système linéaire creux)
+        # ou "modified" (k balayages, modified policy iteration)
+        if evaluation not in ("sweep", "exact", "modified"):
+            raise ValueError(f"Unknown evaluation mode: {evaluation}")
         self.env = env
         self.gamma = gamma
-        self.policy = np.random.choice(env.action_space.n, size=(env.size, env.size))
-        self.V = np.zeros((env.size, env.size))
+        self.evaluation = evaluation
+        self.k = k
+        # rng: graine ou np.random.Generator pour la politique initiale aléatoire
+        self.rng = make_rng(rng)
+        self.policy = self.rng.integers(env.action_space.n, size=env.table_shape())
+        self.V = np.zeros(env.table_shape())
 
-    def train(self, episodes=1000):
+    def train(self, episodes=1000, callback=None, callback_every=1):
         errors = []
-        for _ in range(episodes):
+        next_states, rewards, _ = self.env.transition_model()
+        V = self.V.reshape(-1)  # vue à plat: s = y * size + x
+        start = time.time()
+        for episode in range(episodes):
+            policy = self.policy.reshape(-1)
             # Policy Evaluation
-            delta = 0
-            for y in range(self.env.size):
-                for x in range(self.env.size):
-                    v = self.V[y, x]
-                    action = self.policy[y, x]
-                    next_state, reward, done, _ = self.env.simulate_step((x, y), action)
-                    ny, nx = next_state[1], next_state[0]
-                    self.V[y, x] = reward + self.gamma * self.V[ny, nx]
-                    delta = max(delta, abs(v - self.V[y, x]))
+            delta = self.policy_evaluation(V, policy, next_states, rewards)
             # Policy Improvement
-            policy_stable = True
-            for y in range(self.env.size):
-                for x in range(self.env.size):
-                    old_action = self.policy[y, x]
-                    q_values = []
-                    for a in range(self.env.action_space.n):
-                        next_state, reward, done, _ = self.env.simulate_step((x, y), a)
-                        ny, nx = next_state[1], next_state[0]
-                        q_values.append(reward + self.gamma * self.V[ny, nx])
-                    self.policy[y, x] = np.argmax(q_values)
-                    if old_action != self.policy[y, x]:
-                        policy_stable = False
+            q_values = rewards + self.gamma * V[next_states]
+            new_policy = np.argmax(q_values, axis=1)
+            if self.evaluation != "sweep":
+                # Garder l'action courante en cas d'égalité (bruit numérique du solveur)
+                ties = q_values[np.arange(V.size), policy] >= np.max(q_values, axis=1) - 1e-9
+                new_policy[ties] = policy[ties]
+            policy_stable = np.array_equal(new_policy, policy)
+            self.policy = new_policy.reshape(self.V.shape)
             errors.append(delta)
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, errors[-1], time.time() - start) is False:
+                    break
+            # En mode "sweep", V n'est pas encore évaluée quand la politique se stabilise
+            if policy_stable and self.evaluation != "sweep":
+                break
         return self.policy, errors
 
+    def policy_evaluation(self, V, policy, next_states, rewards):
+        """Évalue la politique sur V à plat (modifiée sur place), retourne delta"""
+        V_old = V.copy()
+        if self.evaluation == "exact":
+            states, values = solve_policy_values(policy, next_states, rewards, self.gamma)
+            V[states] = values
+        elif self.evaluation == "modified":
+            states = np.arange(V.size)
+            r_pi = rewards[states, policy]
+            next_pi = next_states[states, policy]
+            for _ in range(self.k):
+                V[:] = r_pi + self.gamma * V[next_pi]
+        else:
+            for s in range(V.size):
+                action = policy[s]
+                V[s] = rewards[s, action] + self.gamma * V[next_states[s, action]]
+        return np.max(np.abs(V - V_old))
+
     # ---- Sauvegarde / Chargement ----
     def save_table(self, policy_file="policy_PI.npy", V_file="V_PI.npy"):
         np.save(policy_file, self.policy)
@@ -44,3 +94,10 @@ class PolicyIterationAgent:
     def load_table(self, policy_file="policy_PI.npy", V_file="V_PI.npy"):
         self.policy = np.load(policy_file)
         self.V = np.load(V_file)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
@@ -1,30 +1,63 @@
 import numpy as np
+import time
+
+from envs.vector_grid_env import VectorGridWorld
+from agents.checkpoint import save_checkpoint, load_checkpoint
+from agents.random_stream import RandomStream, make_rng
 
 class QLearningAgent:
-    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1):
+    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1, rng=None, replay=None, replay_batch=32):
         self.env = env
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
-        self.Q = np.zeros((env.size, env.size, env.action_space.n))
+        # rng: graine ou np.random.Generator propre à l'agent (pas d'état global)
+        self.rng = make_rng(rng)
+        self._random = RandomStream(self.rng, env.action_space.n)
+        # Mode flat_states: Q (S, A) indexée directement par l'entier d'état
+        self.Q = np.zeros(env.table_shape() + (env.action_space.n,))
+        # replay: ReplayBuffer / PrioritizedReplayBuffer (états à plat) optionnel;
+        # chaque pas réel y est ajouté puis replay_batch transitions sont rejouées
+        self.replay = replay
+        self.replay_batch = replay_batch
 
     def choose_action(self, state):
+        action = self._random.explore(self.epsilon)
+        if action is not None:
+            return action
+        if self.env.flat_states:
+            return self.Q[state].argmax()
         y, x = state[1], state[0]
-        if np.random.rand() < self.epsilon:
-            return np.random.choice(self.env.action_space.n)
         return np.argmax(self.Q[y, x])
 
-    def train(self, episodes=1000):
+    def train(self, episodes=1000, callback=None, callback_every=1):
         errors = []
-        policy = np.zeros((self.env.size, self.env.size))
+        policy = np.zeros(self.Q.shape[:-1])
+        flat = self.env.flat_states
+        replay = self.replay
+        size = self.env.size
+        start = time.time()
         
-        for _ in range(episodes):
+        for episode in range(episodes):
             state = self.env.reset()
             done = False
             
             while not done:
                 action = self.choose_action(state)
                 next_state, reward, done, _ = self.env.step(action)
+                if replay is not None:
+                    s = state if flat else state[1] * size + state[0]
+                    s_next = next_state if flat else next_state[1] * size + next_state[0]
+                    replay.add(s, action, reward, s_next, done)
+                    self.replay_update()
+                    state = next_state
+                    continue
+                if flat:
+                    # Deux lectures de lignes de Q, pas d'indexation 3-D ni de tuple
+                    q = self.Q[state]
+                    q[action] += self.alpha * (reward + self.gamma * self.Q[next_state].max() - q[action])
+                    state = next_state
+                    continue
                 y, x = state[1], state[0]
                 ny, nx = next_state[1], next_state[0]
                 
@@ -32,16 +65,93 @@ class QLearningAgent:
                 state = next_state
             
             # Erreur / convergence
-            current_policy = np.argmax(self.Q, axis=2)
+            current_policy = np.argmax(self.Q, axis=-1)
             error = np.mean(np.abs(current_policy - policy))
             errors.append(error)
             policy = current_policy.copy()
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, errors[-1], time.time() - start) is False:
+                    break
         
         return policy, errors
 
+    def replay_update(self):
+        """Mise à jour Q-learning vectorisée sur replay_batch transitions rejouées.
+
+        Erreurs TD des (s, a) dupliqués moyennées (scatter-add); avec un
+        PrioritizedReplayBuffer, erreurs pondérées par les poids d'importance
+        et priorités mises à jour avec |erreur TD|.
+        """
+        sampled = self.replay.sample(self.replay_batch)
+        indices, batch = sampled[0], sampled[1]
+        n_actions = self.env.action_space.n
+        Q = self.Q.reshape(-1, n_actions)  # vue à plat: s = y * size + x
+        states, actions = batch["state"], batch["action"]
+        # Comme la mise à jour en ligne, done n'est pas utilisé: Q(but) reste nul
+        td_error = batch["reward"] + self.gamma * np.max(Q[batch["next_state"]], axis=1) - Q[states, actions]
+        if len(sampled) == 3:
+            self.replay.update_priorities(indices, td_error)
+            td_error = td_error * sampled[2]
+        pairs, inverse, counts = np.unique(states * n_actions + actions, return_inverse=True, return_counts=True)
+        Q.reshape(-1)[pairs] += self.alpha * np.bincount(inverse, weights=td_error) / counts
+
+    def train_vectorized(self, episodes=1000, num_envs=64, error_every=10, callback=None):
+        """Q-learning sur num_envs environnements en parallèle (VectorGridWorld).
+
+        Sélection epsilon-greedy et mises à jour TD en une opération par pas pour
+        tous les envs; les erreurs TD des (s, a) dupliqués sont moyennées (scatter-add).
+        L'erreur (changement de politique) n'est calculée que toutes les
+        error_every épisodes terminés, tout comme callback(épisodes terminés, erreur,
+        secondes), qui peut renvoyer False pour arrêter.
+        """
+        venv = VectorGridWorld.from_env(self.env, num_envs)
+        n_actions = self.env.action_space.n
+        Q = self.Q.reshape(-1, n_actions)  # vue à plat: s = y * size + x
+        Q_flat = Q.reshape(-1)
+        errors = []
+        policy = np.argmax(Q, axis=1)
+
+        states = venv.state_index(venv.reset())
+        start = time.time()
+        finished = 0
+        next_check = error_every
+        while finished < episodes:
+            greedy = np.argmax(Q[states], axis=1)
+            explore = self.rng.random(num_envs) < self.epsilon
+            actions = np.where(explore, self.rng.integers(n_actions, size=num_envs), greedy)
+            positions, rewards, dones, info = venv.step(actions)
+            next_states = venv.state_index(info["final_observation"])
+
+            td_error = rewards + self.gamma * np.max(Q[next_states], axis=1) - Q[states, actions]
+            # Scatter-add: moyenne des erreurs TD par (s, a) dupliqué
+            pairs, inverse, counts = np.unique(states * n_actions + actions,
+                                               return_inverse=True, return_counts=True)
+            Q_flat[pairs] += self.alpha * np.bincount(inverse, weights=td_error) / counts
+            states = venv.state_index(positions)
+
+            finished += int(np.count_nonzero(dones))
+            if finished >= next_check:
+                # Erreur / convergence
+                current_policy = np.argmax(Q, axis=1)
+                errors.append(np.mean(np.abs(current_policy - policy)))
+                policy = current_policy
+                next_check = (finished // error_every + 1) * error_every
+                if callback is not None and callback(finished, errors[-1], time.time() - start) is False:
+                    break
+
+        return np.argmax(self.Q, axis=-1), errors
+
     # ---- Sauvegarde / Chargement ----
     def save_table(self, filename="qlearning_Q.npy"):
         np.save(filename, self.Q)
 
     def load_table(self, filename="qlearning_Q.npy"):
         self.Q = np.load(filename)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
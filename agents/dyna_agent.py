@@ -0,0 +1,86 @@
+import numpy as np
+
+from agents.td_agents import TDAgent
+
+class TabularModel:
+    """Modèle déterministe appris des transitions observées, en tableaux compacts.
+
+    next_states (S, A) int32 (-1 = jamais observé), rewards (S, A) float32 et
+    un bitmask des paires (s, a) visitées (1 bit par paire). Les paires
+    visitées sont aussi listées dans l'ordre de première visite pour un
+    échantillonnage uniforme vectorisé.
+    """
+
+    def __init__(self, n_states, n_actions):
+        self.n_actions = n_actions
+        self.next_states = np.full((n_states, n_actions), -1, dtype=np.int32)
+        self.rewards = np.zeros((n_states, n_actions), dtype=np.float32)
+        self.visited = np.zeros((n_states * n_actions + 7) // 8, dtype=np.uint8)
+        self.pairs = np.zeros(min(1024, n_states * n_actions), dtype=np.int64)
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def is_visited(self, s, a):
+        key = s * self.n_actions + a
+        return bool((self.visited[key >> 3] >> (key & 7)) & 1)
+
+    def record(self, s, a, reward, s_next):
+        key = s * self.n_actions + a
+        if not (self.visited[key >> 3] >> (key & 7)) & 1:
+            self.visited[key >> 3] |= 1 << (key & 7)
+            if self.n == len(self.pairs):
+                self.pairs = np.concatenate([self.pairs, np.zeros_like(self.pairs)])
+            self.pairs[self.n] = key
+            self.n += 1
+        self.next_states[s, a] = s_next
+        self.rewards[s, a] = reward
+
+    def sample(self, rng, k):
+        """k paires visitées tirées uniformément (avec remise): (états, actions)"""
+        keys = self.pairs[rng.integers(self.n, size=k)]
+        return np.divmod(keys, self.n_actions)
+
+    def nbytes(self):
+        return self.next_states.nbytes + self.rewards.nbytes + self.visited.nbytes + self.pairs.nbytes
+
+class DynaQAgent(TDAgent):
+    """Dyna-Q: Q-learning sur les transitions réelles + planification sur un modèle appris.
+
+    Chaque transition réelle est enregistrée dans un TabularModel; toutes les
+    plan_every transitions, planning_steps * plan_every mises à jour
+    Q-learning simulées sont faites d'un bloc sur des paires visitées tirées
+    au hasard (erreurs TD des paires dupliquées moyennées, comme
+    QLearningAgent.train_vectorized).
+    """
+
+    table_file = "dyna_q_Q.npy"
+
+    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1, planning_steps=10, plan_every=1, rng=None):
+        super().__init__(env, alpha=alpha, gamma=gamma, epsilon=epsilon, rng=rng)
+        self.planning_steps = planning_steps
+        self.plan_every = plan_every
+        self.model = TabularModel(env.size * env.size, env.action_space.n)
+        self._pending = 0
+
+    def _update(self, Q, s, a, r, s_next, a_next):
+        q = Q[s]
+        q[a] += self.alpha * (r + self.gamma * Q[s_next].max() - q[a])
+        self.model.record(s, a, r, s_next)
+        self._pending += 1
+        if self._pending >= self.plan_every:
+            self.plan(Q, self.planning_steps * self._pending)
+            self._pending = 0
+
+    def plan(self, Q, k):
+        """k mises à jour Q-learning simulées, vectorisées, sur Q à plat (S, A)"""
+        if k <= 0 or not len(self.model):
+            return
+        states, actions = self.model.sample(self.rng, k)
+        next_states = self.model.next_states[states, actions]
+        td_error = (self.model.rewards[states, actions] + self.gamma * np.max(Q[next_states], axis=1)
+                    - Q[states, actions])
+        # Scatter-add: moyenne des erreurs TD par (s, a) dupliqué
+        pairs, inverse, counts = np.unique(states * Q.shape[1] + actions, return_inverse=True, return_counts=True)
+        Q.reshape(-1)[pairs] += self.alpha * np.bincount(inverse, weights=td_error) / counts
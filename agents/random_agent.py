@@ -1,8 +1,10 @@
-import random
+import time
 import numpy as np
+from agents.checkpoint import save_checkpoint, load_checkpoint
+from agents.random_stream import RandomStream, make_rng
 
 class RandomAgent:
-    def __init__(self, env=None):
+    def __init__(self, env=None, rng=None):
         # Si on passe l'environnement, on peut récupérer size/action_space
         if env is not None:
             self.action_space = env.action_space.n
@@ -12,14 +14,23 @@ class RandomAgent:
             self.size = None
         # Créer une "table" vide pour compatibilité avec sauvegarde
         self.table = None
+        # rng: graine ou np.random.Generator propre à l'agent (pas d'état global)
+        self.rng = make_rng(rng)
+        self._random = RandomStream(self.rng, self.action_space)
 
     def choose_action(self, state=None):
-        return random.randint(0, self.action_space - 1)
+        return self._random.action()
 
-    def train(self, episodes=1000):
+    def train(self, episodes=1000, callback=None, callback_every=1):
         """Méthode train pour compatibilité avec les autres agents"""
         # Pour RandomAgent, on retourne des erreurs nulles
         errors = [0] * episodes
+        if callback is not None:
+            start = time.time()
+            for episode in range(callback_every - 1, episodes, callback_every):
+                if callback(episode, 0, time.time() - start) is False:
+                    errors = errors[:episode + 1]
+                    break
         policy = np.zeros((self.size, self.size)) if self.size else None
         return policy, errors
 
@@ -31,4 +42,11 @@ class RandomAgent:
         np.save(filename, self.table)
 
     def load_table(self, filename="random_agent_table.npy"):
-        self.table = np.load(filename)
\ No newline at end of file
+        self.table = np.load(filename)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
\ No newline at end of file
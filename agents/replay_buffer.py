@@ -0,0 +1,182 @@
+import numpy as np
+
+from agents.random_stream import make_rng
+
+def transition_dtype(state_shape=(), state_dtype=np.int32):
+    """dtype structuré d'une transition (state, action, reward, next_state, done).
+
+    state_shape=() pour les agents tabulaires (état = indice à plat y * size + x),
+    ex. (C, H, W) et float32 pour des observations d'agents profonds.
+    """
+    state = (np.dtype(state_dtype), tuple(state_shape)) if state_shape else np.dtype(state_dtype)
+    return np.dtype([("state", state), ("action", np.int16), ("reward", np.float32),
+                     ("next_state", state), ("done", np.bool_)])
+
+class ReplayBuffer:
+    """Tampon circulaire de transitions à capacité fixe, dans un tableau structuré.
+
+    Les colonnes (states, actions, ...) sont des vues du tableau, sans copie.
+    Avec path, le tableau est un np.memmap sur disque (tampons plus grands que
+    la RAM: seules les pages lues sont chargées). sample(k) fait un seul gather
+    de k enregistrements; les colonnes du lot renvoyé sont des vues de ce gather.
+    """
+
+    def __init__(self, capacity, state_shape=(), state_dtype=np.int32, path=None, rng=None):
+        self.capacity = capacity
+        self.dtype = transition_dtype(state_shape, state_dtype)
+        if path is None:
+            self.data = np.zeros(capacity, dtype=self.dtype)
+        else:
+            self.data = np.memmap(path, dtype=self.dtype, mode="w+", shape=(capacity,))
+        self.path = path
+        self.rng = make_rng(rng)
+        self.pos = 0  # prochain emplacement écrit
+        self.size = 0
+
+        # Vues par colonne (aucune copie)
+        self.states = self.data["state"]
+        self.actions = self.data["action"]
+        self.rewards = self.data["reward"]
+        self.next_states = self.data["next_state"]
+        self.dones = self.data["done"]
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """Ajoute une transition (écrase la plus ancienne si le tampon est plein); renvoie son indice"""
+        index = self.pos
+        self.data[index] = (state, action, reward, next_state, done)
+        self.pos = (index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return index
+
+    def extend(self, states, actions, rewards, next_states, dones):
+        """Ajoute un lot de transitions (tableaux de même longueur); renvoie leurs indices"""
+        n = len(actions)
+        indices = (self.pos + np.arange(n)) % self.capacity
+        if n > self.capacity:
+            # Seules les capacity dernières transitions survivent
+            keep = slice(n - self.capacity, n)
+            indices, n = indices[keep], self.capacity
+        else:
+            keep = slice(None)
+        self.states[indices] = np.asarray(states)[keep]
+        self.actions[indices] = np.asarray(actions)[keep]
+        self.rewards[indices] = np.asarray(rewards)[keep]
+        self.next_states[indices] = np.asarray(next_states)[keep]
+        self.dones[indices] = np.asarray(dones)[keep]
+        self.pos = int(indices[-1] + 1) % self.capacity if n else self.pos
+        self.size = min(self.size + n, self.capacity)
+        return indices
+
+    def recent(self, n):
+        """Les n dernières transitions, dans l'ordre; vue sans copie si elles sont contiguës"""
+        n = min(n, self.size)
+        start = self.pos - n
+        if start >= 0:
+            return self.data[start:self.pos]
+        return np.concatenate([self.data[start:], self.data[:self.pos]])
+
+    def sample_indices(self, k):
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        return self.rng.integers(self.size, size=k)
+
+    def sample(self, k):
+        """k transitions tirées uniformément (avec remise): (indices, lot structuré)"""
+        indices = self.sample_indices(k)
+        return indices, self.data[indices]
+
+    def flush(self):
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+
+class SumTree:
+    """Arbre de sommes sur capacity priorités (feuilles), mises à jour et tirages vectorisés.
+
+    tree[1] est la somme totale, les feuilles sont tree[leaves + i]. find(v)
+    descend l'arbre pour tous les v d'un coup (log2(capacity) niveaux).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.depth = int(np.ceil(np.log2(max(capacity, 1))))
+        self.leaves = 1 << self.depth
+        self.tree = np.zeros(2 * self.leaves)
+
+    def total(self):
+        return self.tree[1]
+
+    def priorities(self, indices):
+        return self.tree[self.leaves + np.asarray(indices)]
+
+    def update(self, indices, priorities):
+        nodes = self.leaves + np.asarray(indices, dtype=np.int64).reshape(-1)
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes >> 1)
+        while nodes.size and nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes >> 1)
+
+    def find(self, values):
+        """Indices des feuilles dont l'intervalle de somme cumulée contient chaque valeur"""
+        values = np.array(values, dtype=float)
+        nodes = np.ones(values.shape, dtype=np.int64)
+        for _ in range(self.depth):
+            left = self.tree[2 * nodes]
+            right = values >= left
+            values -= np.where(right, left, 0.0)
+            nodes = 2 * nodes + right
+        return np.minimum(nodes - self.leaves, self.capacity - 1)
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """ReplayBuffer à tirage proportionnel à la priorité (|erreur TD| + eps) ** alpha.
+
+    Les nouvelles transitions reçoivent la priorité maximale courante.
+    sample(k) renvoie aussi les poids d'importance (N * P(i)) ** -beta,
+    normalisés par leur maximum; update_priorities() après la mise à jour.
+    """
+
+    def __init__(self, capacity, state_shape=(), state_dtype=np.int32, path=None, rng=None,
+                 alpha=0.6, beta=0.4, eps=1e-6):
+        super().__init__(capacity, state_shape=state_shape, state_dtype=state_dtype, path=path, rng=rng)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+
+    def add(self, state, action, reward, next_state, done):
+        index = super().add(state, action, reward, next_state, done)
+        self.tree.update(index, self.max_priority)
+        return index
+
+    def extend(self, states, actions, rewards, next_states, dones):
+        indices = super().extend(states, actions, rewards, next_states, dones)
+        self.tree.update(indices, np.full(len(indices), self.max_priority))
+        return indices
+
+    def sample_indices(self, k):
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        # Tirage stratifié: une valeur par segment de la somme totale
+        total = self.tree.total()
+        values = (np.arange(k) + self.rng.random(k)) * (total / k)
+        # Arrondis: jamais au-delà des transitions présentes (priorité nulle)
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def sample(self, k, beta=None):
+        """(indices, lot structuré, poids d'importance) pour k transitions"""
+        beta = self.beta if beta is None else beta
+        indices = self.sample_indices(k)
+        probabilities = self.tree.priorities(indices) / self.tree.total()
+        weights = (self.size * probabilities) ** -beta
+        return indices, self.data[indices], weights / weights.max()
+
+    def update_priorities(self, indices, td_errors):
+        priorities = (np.abs(td_errors) + self.eps) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(np.max(priorities)))
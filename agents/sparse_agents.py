@@ -0,0 +1,68 @@
+import numpy as np
+import time
+
+from agents.random_stream import RandomStream, make_rng
+from agents.sparse_table import SparseTable
+
+class SparseQLearningAgent:
+    """Q-learning pour LargeGridWorld: Q n'existe que pour les états visités.
+
+    Même règle de mise à jour que QLearningAgent, mais Q est une SparseTable
+    indexée par s = y * size + x et limitée à memory_budget octets.
+    """
+
+    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1, memory_budget=256 * 2**20, rng=None):
+        self.env = env
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.rng = make_rng(rng)
+        self._random = RandomStream(self.rng, env.action_space.n)
+        self.Q = SparseTable((env.action_space.n,), memory_budget=memory_budget)
+
+    def choose_action(self, state):
+        action = self._random.explore(self.epsilon)
+        if action is not None:
+            return action
+        return int(np.argmax(self.Q.get(self.env.state_index(state))))
+
+    def train(self, episodes=1000, callback=None, callback_every=1):
+        """Renvoie (politique gloutonne sur les états visités, erreurs).
+
+        L'erreur d'un épisode est la fraction de ses mises à jour qui ont changé
+        l'action gloutonne de l'état (pas de balayage de la grille entière).
+        """
+        errors = []
+        start = time.time()
+
+        for episode in range(episodes):
+            state = self.env.reset()
+            s = self.env.state_index(state)
+            done = False
+            updates = 0
+            changes = 0
+
+            while not done:
+                action = self.choose_action(state)
+                next_state, reward, done, _ = self.env.step(action)
+                s_next = self.env.state_index(next_state)
+
+                q = self.Q.row(s)
+                old_greedy = np.argmax(q)
+                q[action] += self.alpha * (reward + self.gamma * np.max(self.Q.get(s_next)) - q[action])
+                changes += np.argmax(q) != old_greedy
+                updates += 1
+
+                state, s = next_state, s_next
+
+            errors.append(changes / max(updates, 1))
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, errors[-1], time.time() - start) is False:
+                    break
+
+        return self.greedy_policy(), errors
+
+    def greedy_policy(self):
+        """(états visités (n,), actions gloutonnes (n,)), sans tableau size x size"""
+        return self.Q.states(), np.argmax(self.Q.values(), axis=1)
@@ -0,0 +1,68 @@
+import numpy as np
+
+class SparseTable:
+    """Table Q (ou V) qui ne matérialise que les états visités, sous un budget mémoire.
+
+    Un dict état -> ligne et un tableau de lignes float32 qui double de taille à
+    la demande. Les états jamais écrits valent `default`. Dépasser le budget
+    (lignes + index estimés) lève MemoryError au lieu de faire grossir le
+    processus sans limite.
+    """
+
+    # Coût estimé d'une entrée du dict Python (clé int + slot), en octets
+    INDEX_ENTRY_BYTES = 100
+
+    def __init__(self, row_shape=(), memory_budget=256 * 2**20, dtype=np.float32, default=0.0,
+                 initial_rows=1024):
+        self.row_shape = tuple(row_shape)
+        self.dtype = np.dtype(dtype)
+        self.default = default
+        self.memory_budget = memory_budget
+        row_bytes = self.dtype.itemsize * int(np.prod(self.row_shape, dtype=np.int64))
+        self.max_rows = memory_budget // (row_bytes + self.INDEX_ENTRY_BYTES)
+        if self.max_rows < 1:
+            raise ValueError(f"memory_budget={memory_budget} cannot hold a single row")
+        self.index = {}
+        self.rows = np.full((min(initial_rows, self.max_rows),) + self.row_shape, default, dtype=self.dtype)
+        self._default_row = np.full(self.row_shape, default, dtype=self.dtype)
+        self._default_row.flags.writeable = False
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, state):
+        return state in self.index
+
+    def get(self, state):
+        """Ligne de l'état (lecture seule si jamais visité: pas d'allocation)"""
+        i = self.index.get(state)
+        return self._default_row if i is None else self.rows[i]
+
+    def row(self, state):
+        """Ligne modifiable de l'état, créée (valeur par défaut) si besoin"""
+        i = self.index.get(state)
+        if i is None:
+            i = len(self.index)
+            if i >= len(self.rows):
+                self._grow()
+            self.index[state] = i
+        return self.rows[i]
+
+    def _grow(self):
+        if len(self.rows) >= self.max_rows:
+            raise MemoryError(f"SparseTable budget of {self.memory_budget} bytes exhausted "
+                              f"({len(self.index)} states)")
+        new_rows = np.full((min(2 * len(self.rows), self.max_rows),) + self.row_shape, self.default,
+                           dtype=self.dtype)
+        new_rows[:len(self.rows)] = self.rows
+        self.rows = new_rows
+
+    def states(self):
+        return np.fromiter(self.index, dtype=np.int64, count=len(self.index))
+
+    def values(self):
+        """Lignes des états visités, dans l'ordre de states()"""
+        return self.rows[:len(self.index)]
+
+    def nbytes(self):
+        return self.rows.nbytes + len(self.index) * self.INDEX_ENTRY_BYTES
@@ -0,0 +1,253 @@
+import numpy as np
+import time
+
+from agents.checkpoint import save_checkpoint, load_checkpoint
+from agents.random_stream import RandomStream, make_rng
+
+class SparseTrace:
+    """Traces d'éligibilité creuses sur les paires (s, a) à plat (s * A + a).
+
+    Seules les paires touchées sont stockées (indices + valeurs). La trace
+    réelle vaut values * scale: decay() ne multiplie que scale, les valeurs ne
+    sont renormalisées (et les traces sous cutoff oubliées) que lorsque scale
+    passe sous cutoff. Une mise à jour de Q ne coûte donc que O(traces actives).
+    """
+
+    def __init__(self, capacity=256, cutoff=1e-4):
+        self.cutoff = cutoff
+        self.indices = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity)
+        self.n = 0
+        self.scale = 1.0
+        self._slots = {}
+
+    def __len__(self):
+        return self.n
+
+    def clear(self):
+        self.n = 0
+        self.scale = 1.0
+        self._slots.clear()
+
+    def replace(self, key):
+        """Trace remplaçante: e(key) = 1"""
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self.n
+            if slot == len(self.indices):
+                self.indices = np.concatenate([self.indices, np.zeros_like(self.indices)])
+                self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+            self.indices[slot] = key
+            self._slots[key] = slot
+            self.n += 1
+        self.values[slot] = 1.0 / self.scale
+
+    def decay(self, factor):
+        if factor == 0.0:
+            self.clear()
+            return
+        self.scale *= factor
+        if self.scale < self.cutoff:
+            self._compact()
+
+    def _compact(self):
+        values = self.values[:self.n] * self.scale
+        keep = np.flatnonzero(values >= self.cutoff)
+        self.n = keep.size
+        self.indices[:self.n] = self.indices[keep]
+        self.values[:self.n] = values[keep]
+        self.scale = 1.0
+        self._slots = dict(zip(self.indices[:self.n].tolist(), range(self.n)))
+
+    def apply(self, table, step):
+        """table[paires tracées] += step * e (table à plat (S * A,))"""
+        n = self.n
+        table[self.indices[:n]] += (step * self.scale) * self.values[:n]
+
+class TDAgent:
+    """Base des agents TD on-policy (SARSA et variantes) sur GridWorld.
+
+    Même interface que QLearningAgent (train / choose_action / save_table /
+    checkpoints, modes grille et flat_states). Les sous-classes définissent
+    _update(Q, s, a, r, s_next, a_next), appelée à chaque transition avec Q à
+    plat (S, A) et les états à plat; l'action suivante est déjà choisie.
+    """
+
+    table_file = "td_Q.npy"
+
+    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1, rng=None):
+        self.env = env
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        # rng: graine ou np.random.Generator propre à l'agent (pas d'état global)
+        self.rng = make_rng(rng)
+        self._random = RandomStream(self.rng, env.action_space.n)
+        self.Q = np.zeros(env.table_shape() + (env.action_space.n,))
+
+    def _index(self, state):
+        return state if self.env.flat_states else state[1] * self.env.size + state[0]
+
+    def choose_action(self, state):
+        action = self._random.explore(self.epsilon)
+        if action is not None:
+            return action
+        if self.env.flat_states:
+            return self.Q[state].argmax()
+        y, x = state[1], state[0]
+        return np.argmax(self.Q[y, x])
+
+    def _start_episode(self):
+        pass
+
+    def _end_episode(self, Q):
+        pass
+
+    def train(self, episodes=1000, callback=None, callback_every=1):
+        """Renvoie (politique gloutonne, erreurs).
+
+        L'erreur d'un épisode est la fraction des états dont l'action gloutonne
+        a changé; seuls les états visités sont réévalués (pas d'argmax sur Q entier).
+        """
+        errors = []
+        Q = self.Q.reshape(-1, self.env.action_space.n)  # vue à plat: s = y * size + x
+        policy = np.argmax(Q, axis=1)
+        start = time.time()
+
+        for episode in range(episodes):
+            state = self.env.reset()
+            s = self._index(state)
+            action = self.choose_action(state)
+            visited = [s]
+            self._start_episode()
+            done = False
+
+            while not done:
+                next_state, reward, done, _ = self.env.step(action)
+                s_next = self._index(next_state)
+                next_action = self.choose_action(next_state)
+                self._update(Q, s, action, reward, s_next, next_action)
+                state, s, action = next_state, s_next, next_action
+                visited.append(s)
+            self._end_episode(Q)
+
+            # Erreur / convergence: seuls les états visités ont pu changer
+            touched = np.unique(visited)
+            greedy = np.argmax(Q[touched], axis=1)
+            errors.append(np.count_nonzero(greedy != policy[touched]) / len(policy))
+            policy[touched] = greedy
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, errors[-1], time.time() - start) is False:
+                    break
+
+        return policy.reshape(self.Q.shape[:-1]), errors
+
+    # ---- Sauvegarde / Chargement ----
+    def save_table(self, filename=None):
+        np.save(filename or self.table_file, self.Q)
+
+    def load_table(self, filename=None):
+        self.Q = np.load(filename or self.table_file)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
+
+class SarsaAgent(TDAgent):
+    """SARSA: cible r + gamma * Q(s', a') avec a' l'action effectivement jouée"""
+
+    table_file = "sarsa_Q.npy"
+
+    def _update(self, Q, s, a, r, s_next, a_next):
+        q = Q[s]
+        q[a] += self.alpha * (r + self.gamma * Q[s_next, a_next] - q[a])
+
+class ExpectedSarsaAgent(TDAgent):
+    """Expected SARSA: cible r + gamma * E_pi[Q(s', .)] sous la politique epsilon-greedy"""
+
+    table_file = "expected_sarsa_Q.npy"
+
+    def _update(self, Q, s, a, r, s_next, a_next):
+        q_next = Q[s_next]
+        expected = (1 - self.epsilon) * q_next.max() + self.epsilon * q_next.mean()
+        q = Q[s]
+        q[a] += self.alpha * (r + self.gamma * expected - q[a])
+
+class NStepSarsaAgent(TDAgent):
+    """SARSA à n pas: la paire jouée n pas plus tôt reçoit n récompenses actualisées + gamma^n Q(s_t+n, a_t+n)"""
+
+    table_file = "nstep_sarsa_Q.npy"
+
+    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1, n=4, rng=None):
+        super().__init__(env, alpha=alpha, gamma=gamma, epsilon=epsilon, rng=rng)
+        self.n = n
+        self._discounts = (gamma ** np.arange(n + 1)).tolist()
+
+    def _start_episode(self):
+        self._pairs = []
+        self._rewards = []
+        self._last = None
+
+    def _update(self, Q, s, a, r, s_next, a_next):
+        self._pairs.append((s, a))
+        self._rewards.append(r)
+        self._last = (s_next, a_next)
+        tau = len(self._rewards) - self.n
+        if tau >= 0:
+            self._backup(Q, tau, Q[s_next, a_next])
+
+    def _end_episode(self, Q):
+        # Paires des n derniers pas: retours tronqués, amorcés sur la dernière paire
+        if self._last is None:
+            return
+        s_last, a_last = self._last
+        for tau in range(max(len(self._rewards) - self.n + 1, 0), len(self._rewards)):
+            self._backup(Q, tau, Q[s_last, a_last])
+
+    def _backup(self, Q, tau, bootstrap):
+        rewards = self._rewards[tau:tau + self.n]
+        G = sum(d * r for d, r in zip(self._discounts, rewards)) + self._discounts[len(rewards)] * bootstrap
+        s, a = self._pairs[tau]
+        Q[s, a] += self.alpha * (G - Q[s, a])
+
+class SarsaLambdaAgent(TDAgent):
+    """SARSA(lambda) à traces remplaçantes creuses (SparseTrace)"""
+
+    table_file = "sarsa_lambda_Q.npy"
+
+    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1, lam=0.9, rng=None):
+        super().__init__(env, alpha=alpha, gamma=gamma, epsilon=epsilon, rng=rng)
+        self.lam = lam
+        self.trace = SparseTrace()
+
+    def _start_episode(self):
+        self.trace.clear()
+
+    def _td_error(self, Q, s, a, r, s_next, a_next):
+        return r + self.gamma * Q[s_next, a_next] - Q[s, a]
+
+    def _update(self, Q, s, a, r, s_next, a_next):
+        delta = self._td_error(Q, s, a, r, s_next, a_next)
+        decay = self._trace_decay(Q, s_next, a_next)  # avant la mise à jour de Q
+        self.trace.replace(s * Q.shape[1] + a)
+        self.trace.apply(Q.reshape(-1), self.alpha * delta)
+        self.trace.decay(decay)
+
+    def _trace_decay(self, Q, s_next, a_next):
+        return self.gamma * self.lam
+
+class QLambdaAgent(SarsaLambdaAgent):
+    """Q(lambda) de Watkins: cible max_a Q(s', a), traces coupées après une action exploratoire"""
+
+    table_file = "q_lambda_Q.npy"
+
+    def _td_error(self, Q, s, a, r, s_next, a_next):
+        return r + self.gamma * Q[s_next].max() - Q[s, a]
+
+    def _trace_decay(self, Q, s_next, a_next):
+        q_next = Q[s_next]
+        return self.gamma * self.lam if q_next[a_next] == q_next.max() else 0.0
@@ -1,36 +1,78 @@
+import heapq
 import numpy as np
+import time
+from agents.checkpoint import save_checkpoint, load_checkpoint
+
+def bellman_sweep(V, next_states, rewards, gamma, mode="sync", block_rows=1, size=None, free=None):
+    """Un balayage de Bellman vectorisé sur V à plat (S,), modifié sur place.
+
+    mode="sync"    : Jacobi, Q = R + gamma * V[next] sur tous les états d'un coup.
+    mode="inplace" : Gauss-Seidel par blocs de `block_rows` lignes de la grille,
+                     chaque bloc voit les valeurs déjà mises à jour des blocs précédents.
+    `free` (S,) optionnel: masque des états à mettre à jour (ex. hors obstacles).
+    Retourne delta = max |V_new - V_old|.
+    """
+    if mode == "sync":
+        new_V = np.max(rewards + gamma * V[next_states], axis=1)
+        if free is not None:
+            new_V = np.where(free, new_V, V)
+        delta = np.max(np.abs(new_V - V)) if V.size else 0.0
+        V[:] = new_V
+        return delta
+    if mode == "inplace":
+        block = block_rows * (size or int(np.sqrt(V.size)))
+        delta = 0.0
+        for start in range(0, V.size, block):
+            rows = slice(start, start + block)
+            new_V = np.max(rewards[rows] + gamma * V[next_states[rows]], axis=1)
+            if free is not None:
+                new_V = np.where(free[rows], new_V, V[rows])
+            delta = max(delta, np.max(np.abs(new_V - V[rows])))
+            V[rows] = new_V
+        return delta
+    raise ValueError(f"Unknown sweep mode: {mode}")
+
+def predecessor_index(next_states):
+    """Index CSR des prédécesseurs d'un modèle (S, A).
+
+    preds[indptr[s]:indptr[s + 1]] = états p (sans doublon) tels que
+    next_states[p, a] == s pour au moins une action a.
+    """
+    S, A = next_states.shape
+    sources = np.repeat(np.arange(S, dtype=np.int64), A)
+    keys = np.unique(next_states.ravel().astype(np.int64) * S + sources)
+    indptr = np.zeros(S + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // S, minlength=S), out=indptr[1:])
+    return indptr, keys % S
 
 class ValueIterationAgent:
-    def __init__(self, env, gamma=0.9):
+    def __init__(self, env, gamma=0.9, theta=1e-6, mode="sync", block_rows=1):
         self.env = env
         self.gamma = gamma
-        self.V = np.zeros((env.size, env.size))
-        self.policy = np.zeros((env.size, env.size), dtype=int)
+        self.theta = theta
+        self.mode = mode
+        self.block_rows = block_rows
+        self.V = np.zeros(env.table_shape())
+        self.policy = np.zeros(env.table_shape(), dtype=int)
 
-    def train(self, episodes=1000):
+    def train(self, episodes=1000, callback=None, callback_every=1):
         errors = []
-        for _ in range(episodes):
-            delta = 0
-            for y in range(self.env.size):
-                for x in range(self.env.size):
-                    v = self.V[y, x]
-                    q_values = []
-                    for a in range(self.env.action_space.n):
-                        next_state, reward, done, _ = self.env.simulate_step((x, y), a)
-                        ny, nx = next_state[1], next_state[0]
-                        q_values.append(reward + self.gamma * self.V[ny, nx])
-                    self.V[y, x] = max(q_values)
-                    delta = max(delta, abs(v - self.V[y, x]))
-            # Update policy
-            for y in range(self.env.size):
-                for x in range(self.env.size):
-                    q_values = []
-                    for a in range(self.env.action_space.n):
-                        next_state, reward, done, _ = self.env.simulate_step((x, y), a)
-                        ny, nx = next_state[1], next_state[0]
-                        q_values.append(reward + self.gamma * self.V[ny, nx])
-                    self.policy[y, x] = np.argmax(q_values)
+        next_states, rewards, _ = self.env.transition_model()
+        V = self.V.reshape(-1)  # vue à plat: s = y * size + x
+        start = time.time()
+        for episode in range(episodes):
+            delta = bellman_sweep(V, next_states, rewards, self.gamma,
+                                  mode=self.mode, block_rows=self.block_rows, size=self.env.size)
             errors.append(delta)
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, errors[-1], time.time() - start) is False:
+                    break
+            if delta < self.theta:
+                break
+        # Update policy
+        q_values = rewards + self.gamma * V[next_states]
+        self.policy = np.argmax(q_values, axis=1).reshape(self.V.shape)
         return self.policy, errors
 
     # ---- Sauvegarde / Chargement ----
@@ -41,3 +83,168 @@ class ValueIterationAgent:
     def load_table(self, policy_file="policy_VI.npy", V_file="V_VI.npy"):
         self.policy = np.load(policy_file)
         self.V = np.load(V_file)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
+
+
+class PrioritizedSweepingAgent:
+    """Planification par balayage priorisé sur le modèle tabulaire de l'env.
+
+    Au lieu de balayer toute la grille, les états sont sauvegardés (backup de
+    Bellman) par ordre d'erreur de Bellman décroissante via une file de
+    priorité. Après le backup d'un état, seuls ses prédécesseurs (index
+    précalculé) sont réévalués et remis dans la file si leur erreur dépasse
+    theta. Après une modification locale de l'env, mark_changed() ne relance
+    que les états concernés: le coût suit la région affectée.
+
+    Même point fixe que ValueIterationAgent (mêmes backups, done ignoré).
+    Un "épisode" de train() = backups_per_episode backups (par défaut S, le
+    coût d'un balayage complet); l'erreur est la plus grande priorité restante.
+    Sur un modèle nouveau (premier train(), ou env modifié sans mark_changed),
+    ou dès que la propagation a touché plus de sweep_fraction des états ou
+    coûté plus de S backups, le changement est global: la convergence se
+    poursuit alors par balayages vectorisés (bellman_sweep), bien moins coûteux
+    que des backups Python état par état.
+    """
+
+    def __init__(self, env, gamma=0.9, theta=1e-6, backups_per_episode=None, sweep_fraction=0.1):
+        self.env = env
+        self.gamma = gamma
+        self.theta = theta
+        self.backups_per_episode = backups_per_episode or env.size * env.size
+        self.sweep_fraction = sweep_fraction
+        self.V = np.zeros(env.table_shape())
+        self.policy = np.zeros(env.table_shape(), dtype=int)
+        self._model = None
+        self._queue = []
+        self._priority = np.zeros(env.size * env.size)
+        self._touched = set()
+
+    def _sync_model(self):
+        """Recharge le modèle (et l'index des prédécesseurs) s'il a changé; renvoie True dans ce cas"""
+        next_states, rewards, _ = self.env.transition_model()
+        if self._model is not None and self._model[0] is next_states:
+            return False
+        indptr, preds = predecessor_index(next_states)
+        # Listes Python: accès scalaire plus rapide que l'indexation NumPy dans la boucle
+        self._model = (next_states, rewards)
+        self._lists = (next_states.tolist(), rewards.tolist(), indptr.tolist(), preds.tolist())
+        return True
+
+    def _clear_queue(self):
+        # Avant des balayages complets: plus de file, tous les états seront touchés
+        self._queue = []
+        self._priority[:] = 0.0
+        self._touched = set(range(self.env.size * self.env.size))
+
+    def _push(self, s, error):
+        if error > self.theta and error > self._priority[s]:
+            self._priority[s] = error
+            heapq.heappush(self._queue, (-error, s))
+
+    def _seed(self, states):
+        """(Re)met states dans la file avec leur erreur de Bellman courante (vectorisé)"""
+        next_states, rewards = self._model
+        V = self.V.reshape(-1)
+        states = np.asarray(states, dtype=np.int64)
+        errors = np.abs(np.max(rewards[states] + self.gamma * V[next_states[states]], axis=1) - V[states])
+        for s, error in zip(states.tolist(), errors.tolist()):
+            self._push(s, error)
+        self._touched.update(states.tolist())
+
+    def mark_changed(self, cells):
+        """Signale des cases (x, y) modifiées dans l'env (goal déplacé, obstacle ajouté...).
+
+        Les cases et leurs prédécesseurs (dans l'ancien et le nouveau modèle)
+        sont réévalués; le prochain train() ne propage qu'à partir d'eux.
+        """
+        if self._model is None:
+            return  # jamais entraîné: le premier train() évalue tous les états
+        states = [int(y) * self.env.size + int(x) for x, y in cells]
+        affected = set(states)
+        # Prédécesseurs dans l'ancien modèle (ex. voisins d'un nouvel obstacle) puis le nouveau
+        for _ in range(2):
+            _, _, indptr, preds = self._lists
+            for s in states:
+                affected.update(preds[indptr[s]:indptr[s + 1]])
+            self._sync_model()
+        self._seed(sorted(affected))
+
+    def max_priority(self):
+        # Les entrées périmées (priorité déjà traitée ou remplacée) sont retirées au passage
+        while self._queue and -self._queue[0][0] != self._priority[self._queue[0][1]]:
+            heapq.heappop(self._queue)
+        return -self._queue[0][0] if self._queue else 0.0
+
+    def _backups(self, n, max_touched):
+        """Au plus n backups; renvoie leur nombre, ou None si la propagation dépasse max_touched états"""
+        next_states, rewards, indptr, preds = self._lists
+        V = self.V.reshape(-1)
+        gamma = self.gamma
+        queue, priority, touched = self._queue, self._priority, self._touched
+        done = 0
+        while queue and done < n:
+            neg_error, s = heapq.heappop(queue)
+            if -neg_error != priority[s]:
+                continue  # entrée périmée
+            priority[s] = 0.0
+            V[s] = max(r + gamma * V[n_] for r, n_ in zip(rewards[s], next_states[s]))
+            done += 1
+            # Seuls les prédécesseurs de s voient un successeur changer
+            for p in preds[indptr[s]:indptr[s + 1]]:
+                touched.add(p)
+                best = max(r + gamma * V[n_] for r, n_ in zip(rewards[p], next_states[p]))
+                self._push(p, abs(best - V[p]))
+            if len(touched) > max_touched:
+                return None
+        return done
+
+    def train(self, episodes=1000, callback=None, callback_every=1):
+        errors = []
+        full_sweeps = self._sync_model()
+        if full_sweeps:
+            # Modèle nouveau ou modifié sans mark_changed: tous les états sont candidats
+            self._clear_queue()
+        next_states, rewards = self._model
+        max_touched = self.sweep_fraction * self.env.size * self.env.size
+        budget = self.env.size * self.env.size
+        start = time.time()
+        for episode in range(episodes):
+            if full_sweeps:
+                delta = bellman_sweep(self.V.reshape(-1), next_states, rewards, self.gamma)
+                full_sweeps = delta >= self.theta
+                errors.append(delta)
+            else:
+                done = self._backups(min(self.backups_per_episode, budget), max_touched)
+                errors.append(self.max_priority())
+                budget -= done or 0
+                if self._queue and (done is None or budget <= 0):
+                    # Changement global (ex. goal déplacé): la file est abandonnée au profit des balayages
+                    self._clear_queue()
+                    full_sweeps = True
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, errors[-1], time.time() - start) is False:
+                    break
+            if not full_sweeps and not self._queue:
+                break
+
+        # Politique mise à jour uniquement pour les états dont un successeur a changé
+        if self._touched:
+            states = np.fromiter(self._touched, dtype=np.int64, count=len(self._touched))
+            q_values = rewards[states] + self.gamma * self.V.reshape(-1)[next_states[states]]
+            self.policy.reshape(-1)[states] = np.argmax(q_values, axis=1)
+            self._touched = set()
+        return self.policy, errors
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
@@ -0,0 +1,198 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import numpy as np
+from envs.vector_grid_env import VectorGridWorld
+from agents.MonteCarloAgent import MonteCarloAgent
+from agents.PolicyIteration import PolicyIterationAgent
+from agents.QLearningAgent import QLearningAgent
+from agents.value_agents import ValueIterationAgent
+from trainers.sweep import make_env
+
+DEFAULT_SIZES = [6, 50, 200, 500]
+
+def measure_rate(fn, min_time=1.0):
+    """Appelle fn() (qui renvoie un nombre d'unités) jusqu'à min_time secondes; renvoie unités/s"""
+    units = 0
+    start = time.perf_counter()
+    while True:
+        units += fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return units / elapsed
+
+class CallCounter:
+    """Compte les appels (ou les éléments traités) d'une méthode, le temps d'un bloc with"""
+
+    def __init__(self, owner, name, per_call=lambda args, result: 1):
+        self.owner = owner
+        self.name = name
+        self.per_call = per_call
+        self.count = 0
+
+    def __enter__(self):
+        self.original = getattr(self.owner, self.name)
+        original = self.original
+
+        def wrapper(*args, **kwargs):
+            result = original(*args, **kwargs)
+            self.count += self.per_call(args, result)
+            return result
+
+        setattr(self.owner, self.name, wrapper)
+        return self
+
+    def __exit__(self, *exc):
+        if isinstance(self.owner, type):
+            setattr(self.owner, self.name, self.original)
+        else:
+            delattr(self.owner, self.name)
+
+    def take(self):
+        count, self.count = self.count, 0
+        return count
+
+def bench_env(size, min_time):
+    env = make_env(size, 0.05, np.random.default_rng(0))
+    rng = np.random.default_rng(0)
+    actions = rng.integers(4, size=100_000).tolist()
+    states = [tuple(s) for s in rng.integers(size, size=(100_000, 2)).tolist()]
+
+    def run_steps():
+        env.reset()
+        for a in actions[:1000]:
+            if env.step(a)[2]:
+                env.reset()
+        return 1000
+
+    def run_simulate():
+        for s, a in zip(states[:1000], actions[:1000]):
+            env.simulate_step(s, a)
+        return 1000
+
+    def build_model():
+        env._model = None
+        env.transition_model()
+        return 1
+
+    return {
+        "gridworld.step": (measure_rate(run_steps, min_time), "calls/s"),
+        "gridworld.simulate_step": (measure_rate(run_simulate, min_time), "calls/s"),
+        "gridworld.transition_model": (measure_rate(build_model, min_time), "builds/s"),
+    }
+
+def counted(train, counter):
+    """fn() pour measure_rate: lance train() et renvoie le nombre de transitions comptées"""
+    def run():
+        train()
+        return counter.take()
+    return run
+
+def bench_td_agents(size, min_time):
+    env = make_env(size, 0.05, np.random.default_rng(0))
+    results = {}
+
+    agent = QLearningAgent(env, rng=0)
+    with CallCounter(env, "step") as counter:
+        rate = measure_rate(counted(lambda: agent.train(episodes=1), counter), min_time)
+        results["qlearning.train"] = (rate, "transitions/s")
+
+    agent = QLearningAgent(env, rng=0)
+    with CallCounter(VectorGridWorld, "step", lambda args, result: len(args[1])) as counter:
+        rate = measure_rate(counted(lambda: agent.train_vectorized(episodes=256, num_envs=256), counter), min_time)
+        results["qlearning.train_vectorized"] = (rate, "transitions/s")
+
+    agent = MonteCarloAgent(env, rng=0)
+    with CallCounter(env, "step") as counter:
+        rate = measure_rate(counted(lambda: agent.train(episodes=1), counter), min_time)
+        results["montecarlo.train"] = (rate, "transitions/s")
+    return results
+
+def bench_planning_agents(size, min_time, max_iterations=10_000):
+    env = make_env(size, 0.05, np.random.default_rng(0))
+    env.transition_model()
+    results = {}
+
+    agent = ValueIterationAgent(env, theta=0.0)
+    results["value_iteration.sweeps"] = (measure_rate(lambda: len(agent.train(episodes=1)[1]), min_time), "sweeps/s")
+    agent = ValueIterationAgent(env)
+    start = time.perf_counter()
+    _, errors = agent.train(episodes=max_iterations)
+    results["value_iteration.time_to_convergence"] = (time.perf_counter() - start, "s")
+    results["value_iteration.iterations"] = (len(errors), "iterations")
+
+    agent = PolicyIterationAgent(env, rng=0)
+    results["policy_iteration.sweeps"] = (measure_rate(lambda: len(agent.train(episodes=1)[1]), min_time), "sweeps/s")
+    agent = PolicyIterationAgent(env, evaluation="modified", k=20, rng=0)
+    start = time.perf_counter()
+    _, errors = agent.train(episodes=max_iterations)
+    results["policy_iteration.time_to_convergence"] = (time.perf_counter() - start, "s")
+    results["policy_iteration.iterations"] = (len(errors), "iterations")
+    return results
+
+# Métriques où une valeur plus petite est meilleure
+LOWER_IS_BETTER_UNITS = {"s", "iterations"}
+
+def run_benchmarks(sizes=DEFAULT_SIZES, min_time=1.0):
+    results = {}
+    for size in sizes:
+        print(f"=== size {size} ===")
+        for bench in (bench_env, bench_td_agents, bench_planning_agents):
+            for name, (value, unit) in bench(size, min_time).items():
+                key = f"{name}/size={size}"
+                results[key] = {"value": float(value), "unit": unit}
+                print(f"{key:55s} {value:14.2f} {unit}")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def compare(current, baseline, threshold=0.1):
+    """Compare deux rapports; renvoie la liste des régressions au-delà de threshold"""
+    regressions = []
+    for key, entry in sorted(current["results"].items()):
+        if key not in baseline["results"]:
+            continue
+        old = baseline["results"][key]["value"]
+        new = entry["value"]
+        if old == 0:
+            continue
+        # ratio > 1: amélioration, < 1: régression
+        ratio = old / new if entry["unit"] in LOWER_IS_BETTER_UNITS else new / old
+        status = "REGRESSION" if ratio < 1 - threshold else "ok"
+        print(f"{key:55s} {old:14.2f} -> {new:14.2f} {entry['unit']:14s} x{ratio:.2f} {status}")
+        if status == "REGRESSION":
+            regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="GridWorld and agent throughput benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds per throughput measurement")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.min_time)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,16 @@
 import gym
 from gym import spaces
 import numpy as np
-import pygame
 
 class GridWorld(gym.Env):
-    metadata = {'render.modes': ['human']}
+    metadata = {'render.modes': ['human', 'rgb_array']}
+
+    # Déplacements (dx, dy) par action: 0=haut, 1=droite, 2=bas, 3=gauche
+    ACTION_DELTAS = np.array([(0, 1), (1, 0), (0, -1), (-1, 0)])
 
     def __init__(self, size=6, start_pos=(0,0), goal_positions=[(5,5)],
-                 obstacles=[(1,1),(2,2),(3,1)], max_steps=50, cell_size=60):
+                 obstacles=[(1,1),(2,2),(3,1)], max_steps=50, cell_size=60,
+                 render_mode=None, flat_states=False):
         super(GridWorld, self).__init__()
         self.size = size
         self.start_pos = np.array(start_pos)
@@ -18,22 +21,59 @@ class GridWorld(gym.Env):
         self.agent_pos = self.start_pos.copy()
         self.steps = 0
 
+        # Modèle tabulaire (next_states, rewards, dones), construit à la demande
+        self._model = None
+        self._model_key = None
+
+        # flat_states=True: les états sont des entiers s = y * size + x et step()
+        # se réduit à des lectures dans le modèle (S, A), sans tuple ni tableau par pas
+        self.flat_states = flat_states
+        self.state = self.state_index(self.start_pos)
+        self._step_table = None
+        self._step_source = None
+        if flat_states:
+            self._sync_step_table()
+
         self.action_space = spaces.Discrete(4)
         self.observation_space = spaces.MultiDiscrete([size, size])
 
-        # Pygame setup
-        pygame.init()
+        # Pygame: initialisé paresseusement au premier render() (headless par défaut)
+        self.render_mode = render_mode
         self.window_size = self.size * self.cell_size
-        self.screen = pygame.display.set_mode((self.window_size, self.window_size))
-        pygame.display.set_caption("GridWorld")
-        self.clock = pygame.time.Clock()
+        self.screen = None
+        self.surface = None
+        self.clock = None
 
     def reset(self):
         self.agent_pos = self.start_pos.copy()
         self.steps = 0
+        if self.flat_states:
+            self._sync_step_table()  # goals / obstacles modifiés entre deux épisodes
+            self.state = self.state_index(self.start_pos)
+            return self.state
         return tuple(self.agent_pos)
 
+    def table_shape(self):
+        """Forme des tables par état (V, politique): (S,) en mode flat_states, (size, size) sinon"""
+        return (self.size * self.size,) if self.flat_states else (self.size, self.size)
+
+    def _sync_step_table(self):
+        next_states, rewards, dones = self.transition_model()
+        if self._step_source is not next_states:
+            # Listes Python: accès scalaire plus rapide que l'indexation NumPy (pas de boxing)
+            self._step_table = (next_states.tolist(), rewards.tolist(), dones.tolist())
+            self._step_source = next_states
+
+    def _step_flat(self, action):
+        self.steps += 1
+        s = self.state
+        next_states, rewards, dones = self._step_table
+        self.state = next_states[s][action]
+        return self.state, rewards[s][action], dones[s][action] or self.steps >= self.max_steps, {}
+
     def step(self, action):
+        if self.flat_states:
+            return self._step_flat(action)
         self.steps += 1
         old_pos = self.agent_pos.copy()
         
@@ -95,39 +135,125 @@ class GridWorld(gym.Env):
 
         return new_state, reward, done, {}
 
-    def render(self, mode='human'):
+    def state_index(self, state):
+        """Indice entier s = y * size + x d'un état (x, y), cohérent avec V.reshape(-1)"""
+        x, y = state
+        return int(y) * self.size + int(x)
+
+    def transition_model(self):
+        """Modèle tabulaire dense (next_states, rewards, dones), chacun de forme (S, A).
+
+        Construit une seule fois par configuration (taille, goals, obstacles) et
+        reconstruit automatiquement si les goals ou les obstacles changent.
+        """
+        key = self._layout_key()
+        if self._model is None or key != self._model_key:
+            self._model = self._build_transition_model()
+            self._model_key = key
+        return self._model
+
+    def obstacle_mask(self):
+        """Masque booléen (S,) des cases obstacles, indexé comme transition_model()"""
+        self.transition_model()
+        return self._obstacle_grid.reshape(-1)
+
+    def changed_states(self, other):
+        """Indices à plat y * size + x des cases dont le statut (obstacle, goal) diffère dans other.
+
+        Les deux environnements doivent avoir la même taille (ValueError sinon).
+        """
+        if other.size != self.size:
+            raise ValueError(f"Cannot diff layouts of size {self.size} and {other.size}")
+        self.transition_model()
+        other.transition_model()
+        changed = (self._obstacle_grid != other._obstacle_grid) | (self._goal_grid != other._goal_grid)
+        return np.flatnonzero(changed.reshape(-1))
+
+    def _layout_key(self):
+        return (self.size,
+                tuple(tuple(int(v) for v in goal) for goal in self.goal_positions),
+                tuple(tuple(int(v) for v in obs) for obs in self.obstacles))
+
+    def _build_transition_model(self):
+        size = self.size
+        self._obstacle_grid = np.zeros((size, size), dtype=bool)
+        self._goal_grid = np.zeros((size, size), dtype=bool)
+        for obs in self.obstacles:
+            self._obstacle_grid[obs[1], obs[0]] = True
+        for goal in self.goal_positions:
+            self._goal_grid[goal[1], goal[0]] = True
+
+        states = np.arange(size * size)
+        ys, xs = np.divmod(states, size)
+        new_x = np.clip(xs[:, None] + self.ACTION_DELTAS[:, 0], 0, size - 1)
+        new_y = np.clip(ys[:, None] + self.ACTION_DELTAS[:, 1], 0, size - 1)
+
+        # Même logique que simulate_step: obstacle -> reste sur place, goal -> terminal
+        blocked = self._obstacle_grid[new_y, new_x]
+        dones = self._goal_grid[new_y, new_x] & ~blocked
+        next_states = np.where(blocked, states[:, None], new_y * size + new_x)
+        rewards = np.where(blocked, -1.0, np.where(dones, 10.0, -0.1))
+        return next_states, rewards, dones
+
+    def render(self, mode=None):
+        """Affiche la grille. mode='human' ouvre la fenêtre pygame au premier appel,
+        mode='rgb_array' dessine hors écran et renvoie un tableau (H, W, 3) uint8."""
+        mode = mode or self.render_mode or 'human'
+        pygame = self._init_pygame(mode)
+        if self.flat_states:
+            # step() ne tient à jour que l'entier self.state
+            self.agent_pos = np.array((self.state % self.size, self.state // self.size))
+
+        if mode == 'rgb_array':
+            if self.surface is None:
+                self.surface = pygame.Surface((self.window_size, self.window_size))
+            self._draw(pygame, self.surface)
+            return np.transpose(pygame.surfarray.array3d(self.surface), (1, 0, 2))
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 exit()
 
-        self.screen.fill((255, 255, 255))  # fond blanc
+        self._draw(pygame, self.screen)
+        pygame.display.flip()
+        self.clock.tick(5)
+
+    def _init_pygame(self, mode):
+        # Import et fenêtre pygame seulement au premier rendu (rien en mode headless)
+        import pygame
+        if mode == 'human' and self.screen is None:
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.window_size, self.window_size))
+            pygame.display.set_caption("GridWorld")
+            self.clock = pygame.time.Clock()
+        return pygame
+
+    def _draw(self, pygame, surface):
+        surface.fill((255, 255, 255))  # fond blanc
 
         # Dessiner obstacles
         for obs in self.obstacles:
             pygame.draw.rect(
-                self.screen, (0, 0, 0),
+                surface, (0, 0, 0),
                 (obs[0]*self.cell_size, (self.size-1-obs[1])*self.cell_size, self.cell_size, self.cell_size)
             )
 
         # Dessiner agent
         pygame.draw.rect(
-            self.screen, (0, 0, 255),
+            surface, (0, 0, 255),
             (self.agent_pos[0]*self.cell_size, (self.size-1-self.agent_pos[1])*self.cell_size, self.cell_size, self.cell_size)
         )
 
         # Dessiner objectifs
         for goal in self.goal_positions:
             pygame.draw.rect(
-                self.screen, (0, 255, 0),
+                surface, (0, 255, 0),
                 (goal[0]*self.cell_size, (self.size-1-goal[1])*self.cell_size, self.cell_size, self.cell_size)
             )
 
         # Grille
         for x in range(self.size+1):
-            pygame.draw.line(self.screen, (0,0,0), (x*self.cell_size,0), (x*self.cell_size,self.window_size))
+            pygame.draw.line(surface, (0,0,0), (x*self.cell_size,0), (x*self.cell_size,self.window_size))
         for y in range(self.size+1):
-            pygame.draw.line(self.screen, (0,0,0), (0,y*self.cell_size), (self.window_size,y*self.cell_size))
-
-        pygame.display.flip()
-        self.clock.tick(5)
\ No newline at end of file
+            pygame.draw.line(surface, (0,0,0), (0,y*self.cell_size), (self.window_size,y*self.cell_size))
\ No newline at end of file
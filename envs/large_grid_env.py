@@ -0,0 +1,99 @@
+from gym import spaces
+import numpy as np
+
+# Nombre de bits à 1 de chaque octet
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+class LargeGridWorld:
+    """GridWorld pour très grandes cartes (ex. 10k x 10k) majoritairement vides.
+
+    Mêmes règles et même API pas à pas que GridWorld (reset / step / state_index),
+    mais sans liste d'obstacles ni modèle tabulaire dense: les obstacles sont un
+    bitset (1 bit par case, ligne y = size/8 octets) avec test d'occupation en
+    O(1), les goals un ensemble d'indices à plat y * size + x.
+    """
+
+    def __init__(self, size=10_000, start_pos=(0, 0), goal_positions=None,
+                 obstacles=(), max_steps=1000, obstacle_bits=None):
+        self.size = size
+        self.start_pos = np.array(start_pos)
+        # Par défaut un seul goal, dans le coin opposé au départ
+        goal_positions = goal_positions or [(size - 1, size - 1)]
+        self.goal_positions = [np.array(pos) for pos in goal_positions]
+        self.max_steps = max_steps
+        self.row_bytes = (size + 7) // 8
+
+        if obstacle_bits is None:
+            obstacle_bits = np.zeros((size, self.row_bytes), dtype=np.uint8)
+            obstacles = np.asarray(obstacles, dtype=np.int64).reshape(-1, 2)
+            # Bits en ordre "little": la case x est le bit x & 7 de l'octet x >> 3
+            np.bitwise_or.at(obstacle_bits, (obstacles[:, 1], obstacles[:, 0] >> 3),
+                             (1 << (obstacles[:, 0] & 7)).astype(np.uint8))
+        self.obstacle_bits = obstacle_bits
+        self.goal_states = {int(pos[1]) * size + int(pos[0]) for pos in self.goal_positions}
+        # Départ et goals toujours libres
+        for x, y in [tuple(self.start_pos)] + [tuple(pos) for pos in self.goal_positions]:
+            self.obstacle_bits[y, x >> 3] &= np.uint8(~(1 << (x & 7)) & 0xFF)
+
+        self.agent_pos = self.start_pos.copy()
+        self.steps = 0
+        self.action_space = spaces.Discrete(4)
+        self.observation_space = spaces.MultiDiscrete([size, size])
+
+    @classmethod
+    def random(cls, size, obstacle_density, rng, goal_positions=None, max_steps=1000, block_rows=1024):
+        """Carte aléatoire générée par blocs de lignes (jamais de grille bool size x size)"""
+        obstacle_bits = np.empty((size, (size + 7) // 8), dtype=np.uint8)
+        for start in range(0, size, block_rows):
+            rows = rng.random((min(block_rows, size - start), size)) < obstacle_density
+            obstacle_bits[start:start + len(rows)] = np.packbits(rows, axis=1, bitorder="little")
+        return cls(size=size, start_pos=(0, 0), goal_positions=goal_positions or [(size - 1, size - 1)],
+                   max_steps=max_steps, obstacle_bits=obstacle_bits)
+
+    def is_obstacle(self, x, y):
+        return bool((self.obstacle_bits[y, x >> 3] >> (x & 7)) & 1)
+
+    def obstacle_count(self):
+        return int(_POPCOUNT[self.obstacle_bits].sum(dtype=np.int64))
+
+    def nbytes(self):
+        return self.obstacle_bits.nbytes
+
+    def reset(self):
+        self.agent_pos = self.start_pos.copy()
+        self.steps = 0
+        return tuple(self.agent_pos)
+
+    def step(self, action):
+        self.steps += 1
+        x, y = int(self.agent_pos[0]), int(self.agent_pos[1])
+
+        # Actions: 0=haut, 1=droite, 2=bas, 3=gauche (bord de la grille: reste sur place)
+        if action == 0 and y < self.size - 1:
+            y += 1
+        elif action == 1 and x < self.size - 1:
+            x += 1
+        elif action == 2 and y > 0:
+            y -= 1
+        elif action == 3 and x > 0:
+            x -= 1
+
+        if self.is_obstacle(x, y):
+            reward = -1
+            done = False
+        elif y * self.size + x in self.goal_states:
+            self.agent_pos[:] = (x, y)
+            reward = 10
+            done = True
+        else:
+            self.agent_pos[:] = (x, y)
+            reward = -0.1
+            done = False
+
+        done = done or self.steps >= self.max_steps
+        return tuple(self.agent_pos), reward, done, {}
+
+    def state_index(self, state):
+        """Indice entier s = y * size + x d'un état (x, y), comme GridWorld"""
+        x, y = state
+        return int(y) * self.size + int(x)
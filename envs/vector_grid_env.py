@@ -0,0 +1,68 @@
+from gym import spaces
+import numpy as np
+
+from envs.grid_env import GridWorld
+
+class VectorGridWorld:
+    """N copies de GridWorld avancées ensemble par opérations sur tableaux.
+
+    Les positions sont un seul tableau int (N, 2) de (x, y), comme GridWorld.agent_pos.
+    Les épisodes terminés sont réinitialisés automatiquement; les vraies positions
+    suivantes sont renvoyées dans info["final_observation"].
+    """
+
+    def __init__(self, num_envs=64, size=6, start_pos=(0,0), goal_positions=[(5,5)],
+                 obstacles=[(1,1),(2,2),(3,1)], max_steps=50):
+        self.num_envs = num_envs
+        self.size = size
+        self.start_pos = np.array(start_pos)
+        self.max_steps = max_steps
+
+        # Grilles d'occupation indexées [y, x]
+        self.obstacle_grid = np.zeros((size, size), dtype=bool)
+        self.goal_grid = np.zeros((size, size), dtype=bool)
+        for obs in obstacles:
+            self.obstacle_grid[obs[1], obs[0]] = True
+        for goal in goal_positions:
+            self.goal_grid[goal[1], goal[0]] = True
+
+        self.positions = np.tile(self.start_pos, (num_envs, 1))
+        self.steps = np.zeros(num_envs, dtype=int)
+
+        self.action_space = spaces.Discrete(4)
+        self.observation_space = spaces.MultiDiscrete([size, size])
+
+    @classmethod
+    def from_env(cls, env, num_envs=64):
+        """Construit N copies d'un GridWorld existant (même taille, goals, obstacles)"""
+        return cls(num_envs=num_envs, size=env.size, start_pos=tuple(env.start_pos),
+                   goal_positions=env.goal_positions, obstacles=env.obstacles,
+                   max_steps=env.max_steps)
+
+    def reset(self):
+        self.positions[:] = self.start_pos
+        self.steps[:] = 0
+        return self.positions.copy()
+
+    def step(self, actions):
+        self.steps += 1
+        new_pos = np.clip(self.positions + GridWorld.ACTION_DELTAS[actions], 0, self.size - 1)
+
+        # Collision avec obstacle -> reste sur place
+        blocked = self.obstacle_grid[new_pos[:, 1], new_pos[:, 0]]
+        new_pos[blocked] = self.positions[blocked]
+        reached = self.goal_grid[new_pos[:, 1], new_pos[:, 0]] & ~blocked
+
+        rewards = np.where(blocked, -1.0, np.where(reached, 10.0, -0.1))
+        dones = reached | (self.steps >= self.max_steps)
+
+        info = {"final_observation": new_pos.copy()}
+        # Reset automatique des épisodes terminés
+        new_pos[dones] = self.start_pos
+        self.steps[dones] = 0
+        self.positions = new_pos
+        return new_pos.copy(), rewards, dones, info
+
+    def state_index(self, positions):
+        """Indices entiers y * size + x pour un tableau (N, 2) de positions"""
+        return positions[:, 1] * self.size + positions[:, 0]
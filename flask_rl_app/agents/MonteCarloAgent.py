@@ -1,66 +1,125 @@
 import numpy as np
+import time
+from checkpoint import save_checkpoint, load_checkpoint
+from random_stream import RandomStream, make_rng
 
 class MonteCarloAgent:
-    def __init__(self, env, gamma=0.9):
+    def __init__(self, env, gamma=0.9, visit="first", max_episode_steps=100, rng=None):
+        # visit: "first" (first-visit MC) ou "every" (every-visit MC)
+        if visit not in ("first", "every"):
+            raise ValueError(f"Unknown visit mode: {visit}")
         self.env = env
         self.gamma = gamma
+        self.visit = visit
+        # rng: graine ou np.random.Generator propre à l'agent (pas d'état global)
+        self.rng = make_rng(rng)
+        self._random = RandomStream(self.rng, env.action_space.n)
+        self.max_episode_steps = max_episode_steps  # Éviter les épisodes infinis
         self.Q = np.zeros((env.size, env.size, env.action_space.n))
-        self.returns_sum = np.zeros((env.size, env.size, env.action_space.n))
         self.returns_count = np.zeros((env.size, env.size, env.action_space.n))
 
+        # Buffers d'épisode préalloués (états à plat s = y * size + x)
+        self._states = np.zeros(max_episode_steps, dtype=np.int64)
+        self._actions = np.zeros(max_episode_steps, dtype=np.int64)
+        self._rewards = np.zeros(max_episode_steps)
+        self._returns = np.zeros(max_episode_steps)
+
+    def replan(self, env):
+        """Passe à env (même taille, goals / obstacles modifiés) en gardant Q comme point de départ.
+
+        Les compteurs de retours des états modifiés sont remis à zéro: leurs
+        anciennes moyennes ne pèsent plus sur les nouveaux retours. Renvoie les
+        états modifiés.
+        """
+        changed = self.env.changed_states(env)
+        self.env = env
+        self.Q = np.array(self.Q, dtype=float)  # copies modifiables (tables chargées en mmap)
+        self.returns_count = np.array(self.returns_count, dtype=float)
+        self.returns_count.reshape(-1, self.returns_count.shape[-1])[changed] = 0
+        return changed
+
     def generate_episode(self):
-        episode = []
+        """Joue un épisode aléatoire; renvoie des vues (states, actions, rewards) de longueur T"""
         state = self.env.reset()
         done = False
-        while not done:
-            action = np.random.choice(self.env.action_space.n)
+        t = 0
+        while not done and t < self.max_episode_steps:
+            action = self._random.action()
             next_state, reward, done, _ = self.env.step(action)
-            episode.append((state, action, reward))
+            self._states[t] = state[1] * self.env.size + state[0]
+            self._actions[t] = action
+            self._rewards[t] = reward
             state = next_state
-            if len(episode) > 100:  # Éviter les épisodes infinis
-                break
-        return episode
+            t += 1
+        return self._states[:t], self._actions[:t], self._rewards[:t]
+
+    def train(self, episodes=1000, callback=None, callback_every=1, metrics=None):
+        # metrics: conteneur optionnel (ex. MetricsRecorder borné) à la place d'une liste
+        errors = [] if metrics is None else metrics
+        n_actions = self.env.action_space.n
+        Q = self.Q.reshape(-1, n_actions)  # vue à plat
+        Q_flat = Q.reshape(-1)
+        counts = self.returns_count.reshape(-1)
+        greedy = np.argmax(Q, axis=1)
+        start = time.time()
 
-    def train(self, episodes=1000):
-        errors = []
-        
         for episode_num in range(episodes):
             # Générer un épisode
-            episode = self.generate_episode()
+            states, actions, rewards = self.generate_episode()
+            T = len(states)
+
+            # Un seul parcours à l'envers pour les retours G_t
+            returns = self._returns[:T]
             G = 0
-            
-            # Parcourir l'épisode à l'envers
-            for t in range(len(episode)-1, -1, -1):
-                state, action, reward = episode[t]
-                G = self.gamma * G + reward
-                y, x = state[1], state[0]
-                
-                # First-visit MC
-                if (state, action) not in [(s,a) for s,a,r in episode[:t]]:
-                    self.returns_sum[y, x, action] += G
-                    self.returns_count[y, x, action] += 1
-                    self.Q[y, x, action] = self.returns_sum[y, x, action] / self.returns_count[y, x, action]
-            
-            # Calculer l'erreur (variation de la politique)
+            for t in range(T - 1, -1, -1):
+                G = self.gamma * G + rewards[t]
+                returns[t] = G
+
+            # First-visit: indice de première occurrence de chaque (s, a)
+            pairs = states * n_actions + actions
+            if self.visit == "first":
+                pairs, first = np.unique(pairs, return_index=True)
+                G_sum = returns[first]
+                k = 1
+            else:
+                pairs, inverse, k = np.unique(pairs, return_inverse=True, return_counts=True)
+                G_sum = np.bincount(inverse, weights=returns)
+
+            # Moyenne incrémentale: Q += (somme G - k * Q) / n
+            counts[pairs] += k
+            Q_flat[pairs] += (G_sum - k * Q_flat[pairs]) / counts[pairs]
+
+            # Calculer l'erreur (variation de la politique), seuls les états visités changent
+            touched = np.unique(states)
+            new_greedy = np.argmax(Q[touched], axis=1)
             if episode_num > 0:
-                policy_change = np.mean(np.abs(np.argmax(self.Q, axis=2) - np.argmax(self.Q_old, axis=2)))
-                errors.append(policy_change)
+                errors.append(np.sum(np.abs(new_greedy - greedy[touched])) / len(greedy))
             else:
                 errors.append(1.0)
-                
-            self.Q_old = self.Q.copy()
-        
+            greedy[touched] = new_greedy
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode_num + 1) % callback_every == 0:
+                if callback(episode_num, errors[-1], time.time() - start) is False:
+                    break
+
         policy = np.argmax(self.Q, axis=2)
         return policy, errors
 
     def choose_action(self, state):
         y, x = state[1], state[0]
         if np.all(self.Q[y, x] == 0):
-            return np.random.choice(self.env.action_space.n)
+            return self._random.action()
         return np.argmax(self.Q[y, x])
 
     def save_table(self, filename="montecarlo_Q.npy"):
         np.save(filename, self.Q)
 
     def load_table(self, filename="montecarlo_Q.npy"):
-        self.Q = np.load(filename)
\ No newline at end of file
+        self.Q = np.load(filename)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
@@ -1,55 +1,116 @@
 import numpy as np
+import time
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+from checkpoint import save_checkpoint, load_checkpoint
+from random_stream import make_rng
+
+def solve_policy_values(policy, next_states, rewards, gamma, free=None):
+    """Évaluation exacte de V_pi pour une politique déterministe.
+
+    Résout le système creux (I - gamma * P_pi) V = R_pi, où P_pi a un seul
+    coefficient par ligne. `free` (S,) optionnel restreint le système aux
+    états hors obstacles (aucune transition n'entre dans un obstacle).
+    Retourne (états résolus, valeurs).
+    """
+    n_states = next_states.shape[0]
+    states = np.arange(n_states) if free is None else np.flatnonzero(free)
+    actions = policy[states]
+    # Renuméroter les successeurs dans le sous-système
+    index = np.full(n_states, -1)
+    index[states] = np.arange(states.size)
+    rows = np.arange(states.size)
+    cols = index[next_states[states, actions]]
+    P_pi = sparse.csr_matrix((np.ones(states.size), (rows, cols)), shape=(states.size, states.size))
+    A = sparse.identity(states.size, format="csr") - gamma * P_pi
+    return states, spsolve(A.tocsc(), rewards[states, actions])
 
 class PolicyIterationAgent:
-    def __init__(self, env, gamma=0.9, theta=1e-6):
+    def __init__(self, env, gamma=0.9, theta=1e-6, evaluation="sweep", k=10, rng=None):
+        # evaluation: "sweep" (balayages jusqu'à delta < theta), "exact" (système
+        # linéaire creux) ou "modified" (k balayages, modified policy iteration)
+        if evaluation not in ("sweep", "exact", "modified"):
+            raise ValueError(f"Unknown evaluation mode: {evaluation}")
         self.env = env
         self.gamma = gamma
         self.theta = theta
+        self.evaluation = evaluation
+        self.k = k
         self.V = np.zeros((env.size, env.size))
-        self.policy = np.random.choice(env.action_space.n, size=(env.size, env.size))
+        # rng: graine ou np.random.Generator pour la politique initiale aléatoire
+        self.rng = make_rng(rng)
+        self.policy = self.rng.integers(env.action_space.n, size=(env.size, env.size))
         self.errors = []
         self.trained = False
 
+    def replan(self, env):
+        """Passe à env (même taille, goals / obstacles modifiés) en gardant V et la politique.
+
+        Le prochain train() repart de la politique précédente: hors des zones
+        affectées elle est déjà optimale et l'itération converge en quelques
+        améliorations. Renvoie les états modifiés.
+        """
+        changed = self.env.changed_states(env)
+        self.env = env
+        # Tables chargées en mmap (lecture seule): copie modifiable
+        self.V = np.array(self.V, dtype=float)
+        self.policy = np.array(self.policy, dtype=int)
+        # Nouveaux obstacles: valeur 0, comme après une résolution complète
+        self.V.reshape(-1)[changed[env.obstacle_mask()[changed]]] = 0.0
+        self.trained = False
+        return changed
+
     def policy_evaluation(self):
+        next_states, rewards, _ = self.env.transition_model()
+        obstacles = self.env.obstacle_mask()
+        V = self.V.reshape(-1)  # vue à plat: s = y * size + x
+        policy = self.policy.reshape(-1)
+        if self.evaluation == "exact":
+            states, values = solve_policy_values(policy, next_states, rewards, self.gamma, free=~obstacles)
+            V[states] = values
+            return
+        if self.evaluation == "modified":
+            free = np.flatnonzero(~obstacles)
+            r_pi = rewards[free, policy[free]]
+            next_pi = next_states[free, policy[free]]
+            for _ in range(self.k):
+                V[free] = r_pi + self.gamma * V[next_pi]
+            return
         while True:
             delta = 0
-            for y in range(self.env.size):
-                for x in range(self.env.size):
-                    if (x, y) in self.env.obstacles:
-                        continue
-                    v = self.V[y, x]
-                    action = self.policy[y, x]
-                    next_state, reward, done, _ = self.env.simulate_step((x, y), action)
-                    ny, nx = next_state[1], next_state[0]
-                    self.V[y, x] = reward + self.gamma * self.V[ny, nx]
-                    delta = max(delta, abs(v - self.V[y, x]))
+            for s in range(V.size):
+                if obstacles[s]:
+                    continue
+                v = V[s]
+                action = policy[s]
+                V[s] = rewards[s, action] + self.gamma * V[next_states[s, action]]
+                delta = max(delta, abs(v - V[s]))
             if delta < self.theta:
                 break
 
     def policy_improvement(self):
-        policy_stable = True
-        for y in range(self.env.size):
-            for x in range(self.env.size):
-                if (x, y) in self.env.obstacles:
-                    continue
-                old_action = self.policy[y, x]
-                action_values = []
-                for action in range(self.env.action_space.n):
-                    next_state, reward, done, _ = self.env.simulate_step((x, y), action)
-                    ny, nx = next_state[1], next_state[0]
-                    action_value = reward + self.gamma * self.V[ny, nx]
-                    action_values.append(action_value)
-                self.policy[y, x] = np.argmax(action_values)
-                if old_action != self.policy[y, x]:
-                    policy_stable = False
-        return policy_stable
+        next_states, rewards, _ = self.env.transition_model()
+        free = ~self.env.obstacle_mask()
+        policy = self.policy.reshape(-1)
+        old_policy = policy[free]
+        q_values = rewards[free] + self.gamma * self.V.reshape(-1)[next_states[free]]
+        new_policy = np.argmax(q_values, axis=1)
+        if self.evaluation != "sweep":
+            # Garder l'action courante en cas d'égalité (bruit numérique du solveur)
+            ties = q_values[np.arange(old_policy.size), old_policy] >= np.max(q_values, axis=1) - 1e-9
+            new_policy[ties] = old_policy[ties]
+        policy[free] = new_policy
+        return np.array_equal(old_policy, policy[free])
 
-    def train(self, episodes=1000):
+    def train(self, episodes=1000, callback=None, callback_every=1, metrics=None):
         if self.trained:
             return self.policy, self.errors
         
-        self.errors = []
+        # metrics: conteneur optionnel (ex. MetricsRecorder borné) à la place d'une liste
+        self.errors = [] if metrics is None else metrics
         print(f"Policy Iteration: Starting training for {episodes} iterations")
+        start = time.time()
+        stopped = False
         
         for episode in range(episodes):
             self.V_old = self.V.copy()
@@ -67,12 +128,18 @@ class PolicyIterationAgent:
             self.errors.append(value_change)
             
             print(f"Policy Iteration Episode {episode}: Policy change = {policy_change:.4f}, Value change = {value_change:.6f}")
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, value_change, time.time() - start) is False:
+                    stopped = True
+                    break
             
             if policy_stable:
                 print(f"Policy converged after {episode + 1} iterations")
                 break
         
-        self.trained = True
+        # Un entraînement interrompu n'est pas marqué comme terminé
+        self.trained = not stopped
         return self.policy, self.errors
 
     def choose_action(self, state):
@@ -86,4 +153,13 @@ class PolicyIterationAgent:
     def load_table(self, policy_file="policy_pi.npy", V_file="V_pi.npy"):
         self.policy = np.load(policy_file)
         self.V = np.load(V_file)
-        self.trained = True
\ No newline at end of file
+        self.trained = True
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        meta = load_checkpoint(path, self, mmap=mmap)
+        self.trained = True
+        return meta
\ No newline at end of file
@@ -1,22 +1,41 @@
 import numpy as np
+import time
+from checkpoint import save_checkpoint, load_checkpoint
+from random_stream import RandomStream, make_rng
 
 class QLearningAgent:
-    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1):
+    def __init__(self, env, alpha=0.1, gamma=0.9, epsilon=0.1, rng=None):
         self.env = env
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
+        # rng: graine ou np.random.Generator propre à l'agent (pas d'état global)
+        self.rng = make_rng(rng)
+        self._random = RandomStream(self.rng, env.action_space.n)
         self.Q = np.zeros((env.size, env.size, env.action_space.n))
         self.episode_errors = []
 
+    def replan(self, env):
+        """Passe à env (même taille, goals / obstacles modifiés) en gardant Q comme point de départ.
+
+        Renvoie les états modifiés.
+        """
+        changed = self.env.changed_states(env)
+        self.env = env
+        self.Q = np.array(self.Q, dtype=float)  # copie modifiable (Q chargé en mmap)
+        return changed
+
     def choose_action(self, state):
+        action = self._random.explore(self.epsilon)
+        if action is not None:
+            return action
         y, x = state[1], state[0]
-        if np.random.rand() < self.epsilon:
-            return np.random.choice(self.env.action_space.n)
         return np.argmax(self.Q[y, x])
 
-    def train(self, episodes=1000):
-        self.episode_errors = []
+    def train(self, episodes=1000, callback=None, callback_every=1, metrics=None):
+        # metrics: conteneur optionnel (ex. MetricsRecorder borné) à la place d'une liste
+        self.episode_errors = [] if metrics is None else metrics
+        start = time.time()
         
         for episode in range(episodes):
             state = self.env.reset()
@@ -45,6 +64,10 @@ class QLearningAgent:
             
             avg_error = total_error / max(steps, 1)
             self.episode_errors.append(avg_error)
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, avg_error, time.time() - start) is False:
+                    break
         
         policy = np.argmax(self.Q, axis=2)
         return policy, self.episode_errors
@@ -53,4 +76,11 @@ class QLearningAgent:
         np.save(filename, self.Q)
 
     def load_table(self, filename="qlearning_Q.npy"):
-        self.Q = np.load(filename)
\ No newline at end of file
+        self.Q = np.load(filename)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
\ No newline at end of file
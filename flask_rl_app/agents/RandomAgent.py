@@ -1,8 +1,10 @@
-import random
+import time
 import numpy as np
+from checkpoint import save_checkpoint, load_checkpoint
+from random_stream import RandomStream, make_rng
 
 class RandomAgent:
-    def __init__(self, env=None):
+    def __init__(self, env=None, rng=None):
         self.env = env
         if env is not None:
             self.action_space = env.action_space.n
@@ -11,17 +13,26 @@ class RandomAgent:
             self.action_space = 4
             self.size = None
         self.Q = np.zeros((env.size, env.size, env.action_space.n)) if env else None
+        # rng: graine ou np.random.Generator propre à l'agent (pas d'état global)
+        self.rng = make_rng(rng)
+        self._random = RandomStream(self.rng, self.action_space)
 
     def choose_action(self, state=None):
-        return random.randint(0, self.action_space - 1)
+        return self._random.action()
 
-    def train(self, episodes=1000):
+    def train(self, episodes=1000, callback=None, callback_every=1, metrics=None):
         """Méthode train pour compatibilité"""
-        errors = []
+        # metrics: conteneur optionnel (ex. MetricsRecorder borné) à la place d'une liste
+        errors = [] if metrics is None else metrics
+        start = time.time()
         for episode in range(episodes):
             # Pour Random, on simule un entraînement basique
             error = 0.1 * (1 - episode/episodes)  # Erreur qui diminue légèrement
             errors.append(error)
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, error, time.time() - start) is False:
+                    break
         return None, errors
 
     def save_table(self, filename="random_agent.npy"):
@@ -29,4 +40,11 @@ class RandomAgent:
             np.save(filename, self.Q)
 
     def load_table(self, filename="random_agent.npy"):
-        self.Q = np.load(filename)
\ No newline at end of file
+        self.Q = np.load(filename)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        return load_checkpoint(path, self, mmap=mmap)
\ No newline at end of file
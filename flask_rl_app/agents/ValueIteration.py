@@ -1,45 +1,148 @@
 import numpy as np
+import time
+from checkpoint import save_checkpoint, load_checkpoint
+
+def bellman_sweep(V, next_states, rewards, gamma, mode="sync", block_rows=1, size=None, free=None):
+    """Un balayage de Bellman vectorisé sur V à plat (S,), modifié sur place.
+
+    mode="sync"    : Jacobi, Q = R + gamma * V[next] sur tous les états d'un coup.
+    mode="inplace" : Gauss-Seidel par blocs de `block_rows` lignes de la grille,
+                     chaque bloc voit les valeurs déjà mises à jour des blocs précédents.
+    `free` (S,) optionnel: masque des états à mettre à jour (ex. hors obstacles).
+    Retourne delta = max |V_new - V_old|.
+    """
+    if mode == "sync":
+        new_V = np.max(rewards + gamma * V[next_states], axis=1)
+        if free is not None:
+            new_V = np.where(free, new_V, V)
+        delta = np.max(np.abs(new_V - V)) if V.size else 0.0
+        V[:] = new_V
+        return delta
+    if mode == "inplace":
+        block = block_rows * (size or int(np.sqrt(V.size)))
+        delta = 0.0
+        for start in range(0, V.size, block):
+            rows = slice(start, start + block)
+            new_V = np.max(rewards[rows] + gamma * V[next_states[rows]], axis=1)
+            if free is not None:
+                new_V = np.where(free[rows], new_V, V[rows])
+            delta = max(delta, np.max(np.abs(new_V - V[rows])))
+            V[rows] = new_V
+        return delta
+    raise ValueError(f"Unknown sweep mode: {mode}")
+
+def grid_neighbourhood(states, size):
+    """États donnés et leurs voisins 4-connexes, sans doublon.
+
+    Dans GridWorld, les prédécesseurs d'un état sont lui-même et ses voisins:
+    c'est l'ensemble à réévaluer quand la valeur (ou le statut) d'un état change.
+    """
+    ys, xs = np.divmod(np.asarray(states, dtype=np.int64), size)
+    xs = np.clip(xs[:, None] + np.array([0, 0, 1, 0, -1]), 0, size - 1)
+    ys = np.clip(ys[:, None] + np.array([0, 1, 0, -1, 0]), 0, size - 1)
+    return np.unique(ys * size + xs)
 
 class ValueIterationAgent:
-    def __init__(self, env, gamma=0.9, theta=1e-6):
+    def __init__(self, env, gamma=0.9, theta=1e-6, mode="sync", block_rows=1):
         self.env = env
         self.gamma = gamma
         self.theta = theta
+        self.mode = mode
+        self.block_rows = block_rows
         self.V = np.zeros((env.size, env.size))
         self.policy = np.zeros((env.size, env.size), dtype=int)
         self.errors = []
         self.trained = False
+        # États à repropager après replan(); None tant qu'aucune résolution complète n'existe
+        self._frontier = None
+
+    def replan(self, env):
+        """Passe à env (même taille, goals / obstacles modifiés) sans repartir de zéro.
+
+        V est conservé; le prochain train() ne repropage qu'à partir des cases
+        modifiées et de leurs voisins, puis des voisins des états dont la valeur
+        bouge de plus de theta. Renvoie les états modifiés.
+        """
+        changed = self.env.changed_states(env)
+        self.env = env
+        if self._frontier is not None:
+            # Tables chargées en mmap (lecture seule): copie modifiable avant de repropager
+            self.V = np.array(self.V, dtype=float)
+            self.policy = np.array(self.policy, dtype=int)
+            # Nouveaux obstacles: jamais mis à jour, leur valeur redevient 0 comme après une résolution complète
+            blocked = changed[env.obstacle_mask()[changed]]
+            self.V.reshape(-1)[blocked] = 0.0
+            self._frontier = np.union1d(self._frontier, grid_neighbourhood(changed, env.size))
+            self.trained = False
+        return changed
+
+    def _propagate(self, V, next_states, rewards, free, episodes, callback=None, callback_every=1):
+        """Backups de Bellman limités à la frontière courante, jusqu'à ce qu'elle soit vide.
+
+        Renvoie (arrêt demandé par le callback, masque (S,) des états mis à jour).
+        La frontière restante est conservée si l'entraînement est interrompu.
+        """
+        updated = np.zeros(V.size, dtype=bool)
+        frontier = self._frontier
+        start = time.time()
+        for episode in range(episodes):
+            states = frontier[free[frontier]]
+            new_V = np.max(rewards[states] + self.gamma * V[next_states[states]], axis=1)
+            change = np.abs(new_V - V[states])
+            delta = np.max(change) if states.size else 0.0
+            V[states] = new_V
+            updated[states] = True
+            frontier = grid_neighbourhood(states[change > self.theta], self.env.size)
+
+            self.errors.append(delta)
+            print(f"Value Iteration Episode {episode}: Delta = {delta:.6f} ({states.size} states)")
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, delta, time.time() - start) is False:
+                    self._frontier = frontier
+                    return True, updated
+
+            if frontier.size == 0:
+                print(f"Value Iteration re-converged after {episode + 1} iterations")
+                break
+        self._frontier = frontier
+        return False, updated
 
-    def train(self, episodes=1000):
+    def train(self, episodes=1000, callback=None, callback_every=1, metrics=None):
         if self.trained:
             return self.policy, self.errors
         
-        self.errors = []
+        # metrics: conteneur optionnel (ex. MetricsRecorder borné) à la place d'une liste
+        self.errors = [] if metrics is None else metrics
+        next_states, rewards, _ = self.env.transition_model()
+        obstacles = self.env.obstacle_mask()
+        V = self.V.reshape(-1)  # vue à plat: s = y * size + x
+
+        if self._frontier is not None:
+            # Replanification incrémentale: V déjà résolu, seuls les états affectés bougent
+            print(f"Value Iteration: Replanning from {self._frontier.size} changed states")
+            stopped, updated = self._propagate(V, next_states, rewards, ~obstacles, episodes,
+                                              callback, callback_every)
+            q_values = rewards[updated] + self.gamma * V[next_states[updated]]
+            self.policy.reshape(-1)[updated] = np.argmax(q_values, axis=1)
+            self.trained = not stopped
+            return self.policy, self.errors
+
         print(f"Value Iteration: Starting training for {episodes} iterations")
-        
+        start = time.time()
+        stopped = False
+
         for episode in range(episodes):
-            delta = 0
-            V_old = self.V.copy()
-            
-            for y in range(self.env.size):
-                for x in range(self.env.size):
-                    if (x, y) in self.env.obstacles:
-                        continue
-                    
-                    v_old = self.V[y, x]
-                    action_values = []
-                    
-                    for action in range(self.env.action_space.n):
-                        next_state, reward, done, _ = self.env.simulate_step((x, y), action)
-                        ny, nx = next_state[1], next_state[0]
-                        action_value = reward + self.gamma * self.V[ny, nx]
-                        action_values.append(action_value)
-                    
-                    self.V[y, x] = max(action_values)
-                    delta = max(delta, abs(v_old - self.V[y, x]))
+            delta = bellman_sweep(V, next_states, rewards, self.gamma, mode=self.mode,
+                                  block_rows=self.block_rows, size=self.env.size, free=~obstacles)
             
             self.errors.append(delta)
             print(f"Value Iteration Episode {episode}: Delta = {delta:.6f}")
+            # Hook de progression / annulation: callback(épisode, erreur, secondes) -> False arrête
+            if callback is not None and (episode + 1) % callback_every == 0:
+                if callback(episode, delta, time.time() - start) is False:
+                    stopped = True
+                    break
             
             if delta < self.theta:
                 print(f"Value Iteration converged after {episode + 1} iterations")
@@ -47,21 +150,14 @@ class ValueIterationAgent:
 
         # Extract optimal policy after value iteration
         print("Extracting optimal policy...")
-        for y in range(self.env.size):
-            for x in range(self.env.size):
-                if (x, y) in self.env.obstacles:
-                    continue
-                
-                action_values = []
-                for action in range(self.env.action_space.n):
-                    next_state, reward, done, _ = self.env.simulate_step((x, y), action)
-                    ny, nx = next_state[1], next_state[0]
-                    action_value = reward + self.gamma * self.V[ny, nx]
-                    action_values.append(action_value)
-                
-                self.policy[y, x] = np.argmax(action_values)
+        q_values = rewards + self.gamma * V[next_states]
+        policy = self.policy.reshape(-1)
+        policy[~obstacles] = np.argmax(q_values[~obstacles], axis=1)
         
-        self.trained = True
+        # Un entraînement interrompu n'est pas marqué comme terminé
+        self.trained = not stopped
+        if self.trained:
+            self._frontier = np.zeros(0, dtype=np.int64)
         return self.policy, self.errors
 
     def choose_action(self, state):
@@ -75,4 +171,15 @@ class ValueIterationAgent:
     def load_table(self, policy_file="policy_vi.npy", V_file="V_vi.npy"):
         self.policy = np.load(policy_file)
         self.V = np.load(V_file)
-        self.trained = True
\ No newline at end of file
+        self.trained = True
+        self._frontier = np.zeros(0, dtype=np.int64)
+
+    def save_checkpoint(self, path):
+        """Checkpoint en un seul fichier (tables compactes, env, hyperparamètres, hash)"""
+        return save_checkpoint(path, self)
+
+    def load_checkpoint(self, path, mmap=False):
+        meta = load_checkpoint(path, self, mmap=mmap)
+        self.trained = True
+        self._frontier = np.zeros(0, dtype=np.int64)
+        return meta
\ No newline at end of file
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import zipfile
+import numpy as np
+
+FORMAT_VERSION = 1
+# Tables sauvegardées quand l'agent les possède
+TABLE_NAMES = ("Q", "V", "policy", "returns_count", "table")
+# Tables d'actions (grille (size, size, A) ou à plat (S, A)): argmax à préserver
+ACTION_TABLES = ("Q",)
+HYPERPARAMETERS = ("alpha", "gamma", "epsilon", "theta", "visit", "evaluation", "k", "mode", "block_rows",
+                   "lam", "n", "planning_steps", "plan_every")
+
+def env_layout(env):
+    """Configuration JSON d'un GridWorld (taille, départ, goals, obstacles)"""
+    return {
+        "size": int(env.size),
+        "start_pos": [int(v) for v in env.start_pos],
+        "goal_positions": [[int(v) for v in goal] for goal in env.goal_positions],
+        "obstacles": [[int(v) for v in obs] for obs in env.obstacles],
+        "max_steps": int(env.max_steps),
+    }
+
+def compact(array, tol=1e-3, keep_argmax=False):
+    """Copie de array dans le plus petit dtype adéquat.
+
+    Entiers (politique): le plus petit type entier contenant les valeurs (int8 /
+    uint8 pour des actions). Flottants: float16 si l'erreur reste sous
+    tol * max|array|, float32 sinon. Avec keep_argmax (tables Q), un type n'est
+    retenu que si l'argmax sur le dernier axe ne change pas; à défaut, le dtype
+    d'origine est conservé.
+    """
+    array = np.asarray(array)
+    if array.dtype.kind in "biu":
+        if array.size == 0:
+            return array.astype(np.int8)
+        return array.astype(np.result_type(np.min_scalar_type(array.min()), np.min_scalar_type(array.max())))
+    half = array.astype(np.float16)
+    scale = np.max(np.abs(array), initial=0.0)
+    with np.errstate(invalid="ignore", over="ignore"):
+        error = np.max(np.abs(half - array), initial=0.0)
+    greedy = np.argmax(array, axis=-1) if keep_argmax and array.size else None
+    if np.isfinite(error) and error <= tol * max(scale, 1.0) and (
+            greedy is None or np.array_equal(np.argmax(half, axis=-1), greedy)):
+        return half
+    single = array.astype(np.float32)
+    if greedy is None or np.array_equal(np.argmax(single, axis=-1), greedy):
+        return single
+    return array
+
+def content_hash(arrays, meta):
+    """SHA-256 des métadonnées (hors hash) et du contenu de chaque tableau"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({k: v for k, v in meta.items() if k != "hash"}, sort_keys=True).encode())
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def save_checkpoint(path, agent, tol=1e-3):
+    """Écrit les tables de l'agent, la config de l'env et les hyperparamètres dans un seul fichier.
+
+    Le fichier est un .npz non compressé (lisible par np.load), plus un membre
+    __meta__ (JSON). Renvoie le hash du contenu.
+    """
+    arrays = {name: getattr(agent, name) for name in TABLE_NAMES
+              if isinstance(getattr(agent, name, None), np.ndarray)}
+    env = getattr(agent, "env", None)
+    meta = {
+        "format": FORMAT_VERSION,
+        "agent": type(agent).__name__,
+        "env": env_layout(env) if env is not None else None,
+        "hyperparameters": {name: np.asarray(getattr(agent, name)).item()
+                            for name in HYPERPARAMETERS if hasattr(agent, name)},
+        "dtypes": {name: array.dtype.str for name, array in arrays.items()},
+    }
+    stored = {name: compact(array, tol, keep_argmax=name in ACTION_TABLES) for name, array in arrays.items()}
+    meta["hash"] = content_hash(stored, meta)
+    stored["__meta__"] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+
+    # Écriture atomique: un checkpoint n'est jamais lu à moitié écrit
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **stored)
+    os.replace(tmp_path, path)
+    return meta["hash"]
+
+def _map_member(f, path, info):
+    # Membre .npy stocké sans compression: on saute l'en-tête local zip puis l'en-tête .npy
+    f.seek(info.header_offset + 26)
+    name_length, extra_length = np.frombuffer(f.read(4), dtype="<u2")
+    f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+    if not np.prod(shape, dtype=np.int64):
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                     order="F" if fortran_order else "C")
+
+def read_checkpoint(path, mmap=True, verify=False):
+    """Renvoie (tableaux, métadonnées) d'un checkpoint.
+
+    Avec mmap=True, les tableaux sont projetés en mémoire en lecture seule, dans
+    leur dtype compact (np.load ignore mmap_mode pour un .npz: les membres sont
+    projetés directement à leur position dans l'archive). verify=True relit
+    tout pour contrôler le hash.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            name = info.filename[:-len(".npy")]
+            if mmap and info.compress_type == zipfile.ZIP_STORED and name != "__meta__":
+                arrays[name] = _map_member(f, path, info)
+            else:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+    meta = json.loads(arrays.pop("__meta__").tobytes())
+    if verify and content_hash(arrays, meta) != meta["hash"]:
+        raise ValueError(f"Checkpoint {path} is corrupted (content hash mismatch)")
+    return arrays, meta
+
+def load_checkpoint(path, agent, mmap=False, verify=False):
+    """Charge un checkpoint dans agent et renvoie ses métadonnées.
+
+    mmap=False (défaut, reprise d'entraînement): copies modifiables dans les
+    dtypes d'origine. mmap=True: tables projetées en lecture seule, dans leur
+    dtype compact (inutilisables pour train(); le service passe par read_checkpoint).
+    """
+    arrays, meta = read_checkpoint(path, mmap=mmap, verify=verify)
+    if meta["agent"] != type(agent).__name__:
+        raise ValueError(f"Checkpoint {path} was saved by {meta['agent']}, not {type(agent).__name__}")
+    for name, array in arrays.items():
+        current = getattr(agent, name, None)
+        if isinstance(current, np.ndarray) and current.shape != array.shape:
+            # Même table à plat ou en grille (mode flat_states): simple vue
+            if current.size != array.size:
+                raise ValueError(f"Checkpoint {path}: {name} has shape {array.shape}, expected {current.shape}")
+            array = array.reshape(current.shape)
+        setattr(agent, name, array if mmap else array.astype(meta["dtypes"][name]))
+    return meta
@@ -0,0 +1,50 @@
+import numpy as np
+
+# Tirages pré-générés par bloc (pièces epsilon + actions aléatoires)
+BLOCK_SIZE = 65536
+
+def make_rng(seed=None):
+    """np.random.Generator à partir d'une graine (int, SeedSequence, None) ou d'un Generator existant"""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+def spawn_rngs(seed, n):
+    """n générateurs indépendants dérivés de seed (un par worker / rollout parallèle)"""
+    return make_rng(seed).spawn(n)
+
+class RandomStream:
+    """Flux de tirages d'un agent, générés par blocs de block_size pas.
+
+    Chaque pas consomme une pièce uniforme dans [0, 1) et une action aléatoire
+    tirées ensemble: explore(epsilon) renvoie l'action aléatoire si la pièce
+    tombe sous epsilon, None sinon; action() renvoie l'action aléatoire seule.
+    Les blocs sont des listes Python (lecture scalaire sans boxing NumPy).
+    """
+
+    def __init__(self, rng, n_actions, block_size=BLOCK_SIZE):
+        self.rng = make_rng(rng)
+        self.n_actions = n_actions
+        self.block_size = block_size
+        self._coins = []
+        self._actions = []
+        self._i = 0
+
+    def _refill(self):
+        self._coins = self.rng.random(self.block_size).tolist()
+        self._actions = self.rng.integers(self.n_actions, size=self.block_size).tolist()
+        self._i = 0
+
+    def explore(self, epsilon):
+        if self._i == len(self._coins):
+            self._refill()
+        i = self._i
+        self._i = i + 1
+        return self._actions[i] if self._coins[i] < epsilon else None
+
+    def action(self):
+        if self._i == len(self._actions):
+            self._refill()
+        i = self._i
+        self._i = i + 1
+        return self._actions[i]
@@ -1,34 +1,43 @@
 import sys
 import os
-from flask import Flask, render_template, request, jsonify
+import json
+from collections import namedtuple
+from flask import Flask, Response, render_template, request, jsonify, url_for
+from flask_socketio import SocketIO, emit
 import threading
 import time
+import uuid
 import numpy as np
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "envs"))
 sys.path.append(os.path.join(os.path.dirname(__file__), "agents"))
+sys.path.append(os.path.dirname(__file__))
 
 from grid_env import GridWorld
-from RandomAgent import RandomAgent
-from MonteCarloAgent import MonteCarloAgent
-from QLearningAgent import QLearningAgent
-from PolicyIteration import PolicyIterationAgent
-from ValueIteration import ValueIterationAgent
+from jobs import AGENT_CLASSES, CHECKPOINT_DIR, JobManager, QueueFull, create_agent, seed_streams
+from metrics import MetricsRecorder
+from serving import LatencyHistogram, ModelCache
+from telemetry import TelemetryStream
 
 app = Flask(__name__)
+# Mode threading: l'entraînement tourne dans de vrais threads (pas de green threads)
+socketio = SocketIO(app, async_mode="threading")
+telemetry = TelemetryStream(socketio, max_fps=10)
+job_manager = JobManager()
+model_cache = ModelCache(CHECKPOINT_DIR)
+serving_latency = LatencyHistogram()
 
-AGENT_CLASSES = {
-    "RandomAgent": RandomAgent,
-    "MonteCarloAgent": MonteCarloAgent,
-    "QLearningAgent": QLearningAgent,
-    "PolicyIterationAgent": PolicyIterationAgent,
-    "ValueIterationAgent": ValueIterationAgent
-}
+# Points d'erreur envoyés aux clients, quelle que soit la durée de l'entraînement
+MAX_ERROR_POINTS = 500
+
+# Client Socket.IO (version figée, compatible avec Flask-SocketIO 5.x): copie locale
+# dans static/ si présente, sinon CDN avec hash d'intégrité (SRI)
+SOCKETIO_CLIENT_FILE = "vendor/socket.io-4.7.5.min.js"
+SOCKETIO_CLIENT_CDN = "https://cdn.socket.io/4.7.5/socket.io.min.js"
+SOCKETIO_CLIENT_INTEGRITY = "sha384-2huaZvOR9iDzHqslqwpR87isEmrfxqyWOF7hr7BY6KG0+hVKLoEXMPUJw3ynWuhO"
 
 # Variables globales
 current_data = {
-    "positions": [],
-    "errors": [],
     "goals": [],
     "obstacles": [],
     "size": 6,
@@ -40,7 +49,20 @@ current_data = {
 
 simulation_env = None
 simulation_agent = None
+simulation_config = None  # config de l'entraînement de simulation_agent
 training_active = False
+# Annulation de l'entraînement en cours (un Event par entraînement, levé par /reset)
+training_cancel = threading.Event()
+training_thread = None
+# Erreurs par épisode de l'entraînement courant (mémoire bornée)
+training_metrics = MetricsRecorder()
+
+# Dernière trajectoire simulée: tableau (T, 2) en lecture seule, remplacé en bloc
+# à chaque simulation. Le numéro de version permet aux clients de détecter une
+# nouvelle trajectoire; le rythme de l'animation est appliqué à la lecture.
+Trajectory = namedtuple("Trajectory", ["version", "positions"])
+trajectory = Trajectory(0, np.zeros((0, 2), dtype=np.int16))
+trajectory_lock = threading.Lock()
 
 def convert_to_serializable(obj):
     if isinstance(obj, (np.int32, np.int64, np.int8)):
@@ -58,84 +80,147 @@ def convert_to_serializable(obj):
     else:
         return obj
 
+def publish_trajectory(positions):
+    """Remplace la trajectoire courante par positions (T, 2) et la diffuse aux clients"""
+    global trajectory
+    positions = np.array(positions, dtype=np.int16).reshape(-1, 2)
+    positions.flags.writeable = False
+    with trajectory_lock:
+        trajectory = Trajectory(trajectory.version + 1, positions)
+        published = trajectory
+    telemetry.push(trajectory={"version": published.version, "positions": published.positions.tolist()})
+    return published
+
+def snapshot_data():
+    """État complet pour /data et les snapshots Socket.IO, erreurs sous-échantillonnées"""
+    data = dict(current_data)
+    current = trajectory  # une seule lecture: version et positions cohérentes
+    data["positions"] = current.positions
+    data["trajectory_version"] = current.version
+    data["error_history"] = training_metrics.history(MAX_ERROR_POINTS)
+    data["errors"] = data["error_history"]["mean"]
+    return convert_to_serializable(data)
+
 @app.route("/", methods=["GET", "POST"])
 def index():
-    return render_template("index.html", agents=AGENT_CLASSES.keys())
+    return render_template("index.html", agents=AGENT_CLASSES.keys(), socketio_client=socketio_client())
+
+def socketio_client():
+    """Source du client Socket.IO: {"src", "integrity"} (integrity None pour la copie locale)"""
+    if os.path.exists(os.path.join(app.static_folder, SOCKETIO_CLIENT_FILE)):
+        return {"src": url_for("static", filename=SOCKETIO_CLIENT_FILE), "integrity": None}
+    return {"src": SOCKETIO_CLIENT_CDN, "integrity": SOCKETIO_CLIENT_INTEGRITY}
 
 @app.route("/start_training", methods=["POST"])
 def start_training():
-    global current_data, simulation_env, simulation_agent, training_active
+    global current_data, simulation_env, simulation_agent, training_active, training_cancel, training_metrics
+    global training_thread, simulation_config
     
     if training_active:
         return jsonify({"status": "error", "message": "Training already in progress"})
     
     data = request.json
+    config = parse_job_config(data)
     
     # Réinitialiser les données
     current_data = {
-        "positions": [],
-        "errors": [],
-        "goals": [],
-        "obstacles": [],
-        "size": data.get("grid_size", 6),
+        "goals": config["goals"],
+        "obstacles": config["obstacles"],
+        "size": config["size"],
         "training_complete": False,
         "current_episode": 0,
-        "total_episodes": data.get("episodes", 100),
-        "agent_name": data.get("agent", "RandomAgent")
+        "total_episodes": config["episodes"],
+        "agent_name": config["agent"],
+        "seed": config["seed"]
     }
-    
-    # Configurer l'environnement
-    size = data.get("grid_size", 6)
-    goals = parse_positions(data.get("goal_positions", ""), data.get("num_goals", 1), size)
-    obstacles = parse_positions(data.get("obstacle_positions", ""), data.get("num_obstacles", 3), size)
-    
-    if not goals:
-        goals = [tuple(np.random.randint(0, size, 2)) for _ in range(data.get("num_goals", 1))]
-    if not obstacles:
-        obstacles = [tuple(np.random.randint(0, size, 2)) for _ in range(data.get("num_obstacles", 3))]
-    
-    current_data["goals"] = goals
-    current_data["obstacles"] = obstacles
+    training_metrics = MetricsRecorder()
+    telemetry.clear()
+    publish_trajectory([])
+    socketio.emit("snapshot", snapshot_data())
     
     # Créer l'environnement
     simulation_env = GridWorld(
-        size=size,
-        goal_positions=goals,
-        obstacles=obstacles,
+        size=config["size"],
+        goal_positions=config["goals"],
+        obstacles=config["obstacles"],
         start_pos=(0, 0),
         max_steps=100
     )
     
-    # Créer l'agent
-    agent_name = data.get("agent", "RandomAgent")
-    agent_class = AGENT_CLASSES[agent_name]
+    # Créer l'agent, ou replanifier le précédent à partir des cases modifiées
+    agent_name = config["agent"]
+    previous_agent = simulation_agent
+    changed = None
     
     try:
-        if agent_name == "QLearningAgent":
-            simulation_agent = agent_class(
-                simulation_env,
-                alpha=float(data.get("alpha", 0.1)),
-                gamma=float(data.get("gamma", 0.9)),
-                epsilon=float(data.get("epsilon", 0.1))
-            )
-        elif agent_name in ["MonteCarloAgent", "PolicyIterationAgent", "ValueIterationAgent"]:
-            simulation_agent = agent_class(simulation_env, gamma=float(data.get("gamma", 0.9)))
+        # Un entraînement annulé peut encore finir son épisode: on ne réutilise pas son agent
+        previous_done = training_thread is None or not training_thread.is_alive()
+        if config["incremental"] and previous_done and can_replan(previous_agent, simulation_config, config):
+            changed = previous_agent.replan(simulation_env)
+            simulation_agent = previous_agent
         else:
-            simulation_agent = agent_class(simulation_env)
+            simulation_agent = create_agent(agent_name, simulation_env, config)
+        simulation_config = config
     except Exception as e:
         return jsonify({"status": "error", "message": f"Agent creation failed: {str(e)}"})
+    current_data["replanned_states"] = None if changed is None else int(changed.size)
     
     # Démarrer l'entraînement
     training_active = True
-    thread = threading.Thread(
+    training_cancel = threading.Event()
+    training_thread = threading.Thread(
         target=run_training,
-        args=(data.get("episodes", 100), agent_name)
+        args=(config["episodes"], agent_name, training_cancel, training_metrics)
     )
-    thread.daemon = True
-    thread.start()
+    training_thread.daemon = True
+    training_thread.start()
     
     return jsonify({"status": "training_started"})
 
+# Clés de config qui ne décrivent pas l'agent: la carte (prise en charge par replan) et le déroulé
+RUN_KEYS = ("goals", "obstacles", "episodes", "progress_every", "incremental", "seed")
+
+def can_replan(agent, agent_config, config):
+    """Vrai si agent (entraînement précédent, créé avec agent_config) peut repartir de ses tables.
+
+    Même type d'agent, même taille et mêmes hyperparamètres: toutes les clés de
+    config hors RUN_KEYS doivent être identiques.
+    """
+    if agent is None or agent_config is None or not hasattr(agent, "replan"):
+        return False
+    keys = (set(config) | set(agent_config)) - set(RUN_KEYS)
+    return all(config.get(key) == agent_config.get(key) for key in keys)
+
+def parse_job_config(data):
+    """Configuration complète d'un entraînement à partir du JSON du formulaire"""
+    size = int(data.get("grid_size", 6))
+    goals = parse_positions(data.get("goal_positions", ""), data.get("num_goals", 1), size)
+    obstacles = parse_positions(data.get("obstacle_positions", ""), data.get("num_obstacles", 3), size)
+    
+    # Graine explicite ou tirée puis enregistrée dans la config: tout entraînement est rejouable
+    seed = data.get("seed")
+    seed = int(seed) if seed not in (None, "") else int(np.random.SeedSequence().generate_state(1)[0])
+    rng, _ = seed_streams(seed)
+    if not goals:
+        goals = [tuple(int(v) for v in rng.integers(0, size, 2)) for _ in range(data.get("num_goals", 1))]
+    if not obstacles:
+        obstacles = [tuple(int(v) for v in rng.integers(0, size, 2)) for _ in range(data.get("num_obstacles", 3))]
+    
+    return {
+        "agent": data.get("agent", "RandomAgent"),
+        "size": size,
+        "goals": goals,
+        "obstacles": obstacles,
+        "episodes": int(data.get("episodes", 100)),
+        "alpha": float(data.get("alpha", 0.1)),
+        "gamma": float(data.get("gamma", 0.9)),
+        "epsilon": float(data.get("epsilon", 0.1)),
+        "progress_every": max(1, int(data.get("progress_every", 10))),
+        # Réutiliser l'agent précédent (mêmes agent, taille et hyperparamètres) au lieu de repartir de zéro
+        "incremental": bool(data.get("incremental", False)),
+        "seed": seed
+    }
+
 def parse_positions(position_str, num_positions, grid_size):
     if not position_str:
         return []
@@ -154,38 +239,155 @@ def parse_positions(position_str, num_positions, grid_size):
 
 @app.route("/data")
 def get_data():
-    return jsonify(convert_to_serializable(current_data))
+    return jsonify(snapshot_data())
+
+@app.route("/trajectory")
+def get_trajectory():
+    current = trajectory
+    return jsonify({"version": current.version, "positions": current.positions.tolist()})
+
+@app.route("/trajectory/stream")
+def stream_trajectory():
+    """Rejoue la trajectoire courante pas à pas (Server-Sent Events), au rythme demandé"""
+    interval = min(max(request.args.get("interval", 0.3, type=float), 0.0), 5.0)
+    current = trajectory
+    
+    def generate():
+        # Le rythme est imposé à la lecture: la simulation est déjà terminée
+        for step, position in enumerate(current.positions.tolist()):
+            if step:
+                time.sleep(interval)
+            yield f"data: {json.dumps({'version': current.version, 'step': step, 'position': position})}\n\n"
+    
+    return Response(generate(), mimetype="text/event-stream")
+
+# ---- Jobs concurrents ----
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    config = parse_job_config(request.json)
+    if config["agent"] not in AGENT_CLASSES:
+        return jsonify({"status": "error", "message": f"Unknown agent: {config['agent']}"}), 400
+    try:
+        job = job_manager.submit(config)
+    except QueueFull as e:
+        return jsonify({"status": "error", "message": str(e)}), 429, {"Retry-After": "5"}
+    return jsonify(job.to_dict()), 202
+
+@app.route("/jobs")
+def list_jobs():
+    return jsonify(job_manager.list())
+
+@app.route("/jobs/<job_id>/status")
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    if job.status != "completed":
+        return jsonify(job.to_dict()), 409
+    return jsonify(dict(job.to_dict(), result=job.result))
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+# ---- Service des politiques entraînées ----
+@app.route("/models")
+def list_models():
+    return jsonify({"available": model_cache.available(), "loaded": model_cache.loaded()})
+
+@app.route("/models/<model_id>/actions", methods=["POST"])
+def model_actions(model_id):
+    """Actions (et Q-values si demandé) pour un lot d'états [[x, y], ...]"""
+    with serving_latency.time():
+        data = request.get_json(silent=True) or {}
+        try:
+            model = model_cache.get(model_id)
+        except KeyError:
+            return jsonify({"status": "error", "message": f"Unknown model: {model_id}"}), 404
+        try:
+            indices = model.state_indices(data.get("states", []))
+            response = {"model_id": model_id, "actions": model.actions(indices).tolist()}
+            if data.get("q_values"):
+                response["q_values"] = model.q_values(indices).tolist()
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        return jsonify(response)
+
+@app.route("/models/latency")
+def model_latency():
+    return jsonify(serving_latency.to_dict())
+
+@socketio.on("connect")
+def on_connect():
+    telemetry.start()
+    emit("snapshot", snapshot_data())
 
 @app.route("/reset", methods=["POST"])
 def reset_simulation():
-    global current_data, training_active
-    current_data["positions"] = []
-    current_data["errors"] = []
+    global current_data, training_active, training_metrics
+    training_metrics = MetricsRecorder()
     current_data["training_complete"] = False
     current_data["current_episode"] = 0
     training_active = False
+    training_cancel.set()  # le thread d'entraînement s'arrête à l'épisode suivant
+    telemetry.clear()
+    publish_trajectory([])
+    socketio.emit("snapshot", snapshot_data())
     return jsonify({"status": "reset"})
 
-def run_training(episodes, agent_name):
+def run_training(episodes, agent_name, cancel_event, metrics):
     global current_data, training_active
+    data = current_data
+    last_history = [0.0]
+    
+    def on_progress(episode, error, elapsed):
+        # Appelé par l'agent après chaque épisode: progression en direct et arrêt sur /reset
+        if cancel_event.is_set():
+            return False
+        data["current_episode"] = episode + 1
+        if elapsed - last_history[0] >= telemetry.interval:
+            # Historique sous-échantillonné, au plus une fois par trame
+            last_history[0] = elapsed
+            telemetry.push(current_episode=episode + 1, error_history=metrics.history(MAX_ERROR_POINTS))
+        else:
+            telemetry.push(current_episode=episode + 1)
     
     try:
         print(f"🚀 Starting {agent_name} training for {episodes} episodes...")
         
-        # Entraînement
-        policy, errors = simulation_agent.train(episodes=episodes)
+        # Entraînement (les erreurs sont enregistrées dans metrics, pas dans une liste)
+        simulation_agent.train(episodes=episodes, callback=on_progress, metrics=metrics)
+        
+        if cancel_event.is_set():
+            print(f"🛑 {agent_name} training cancelled")
+            return
         
         # Mettre à jour les données
-        current_data["errors"] = errors
-        current_data["training_complete"] = True
-        current_data["current_episode"] = episodes
+        data["training_complete"] = True
+        data["current_episode"] = episodes
+        telemetry.push(training_complete=True, current_episode=episodes,
+                       error_history=metrics.history(MAX_ERROR_POINTS))
         
         print(f"✅ {agent_name} training completed!")
         
-        # Sauvegarde
+        # Sauvegarde (un checkpoint par entraînement, sans écraser les précédents)
         try:
-            simulation_agent.save_table()
-            print(f"💾 {agent_name} tables saved")
+            os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+            filename = f"{agent_name}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.npz"
+            simulation_agent.save_checkpoint(os.path.join(CHECKPOINT_DIR, filename))
+            data["checkpoint"] = filename
+            data["model_id"] = filename[:-len(".npz")]
+            print(f"💾 {agent_name} checkpoint saved: {filename}")
         except Exception as e:
             print(f"⚠️ Save failed: {e}")
         
@@ -196,36 +398,35 @@ def run_training(episodes, agent_name):
         print(f"❌ Training error for {agent_name}: {e}")
         import traceback
         traceback.print_exc()
-        current_data["training_complete"] = True
+        data["training_complete"] = True
+        telemetry.push(training_complete=True)
     finally:
-        training_active = False
+        # Un entraînement annulé ne libère pas le verrou d'un entraînement plus récent
+        if cancel_event is training_cancel:
+            training_active = False
 
-def run_simulation():
-    global current_data
-    
+def run_simulation(max_steps=50):
+    """Calcule la trajectoire gloutonne d'un bloc, sans pause, puis la publie"""
     if not simulation_env or not simulation_agent:
         return
     
     print("🎮 Starting simulation...")
     
     state = simulation_env.reset()
-    done = False
-    current_data["positions"] = []
-    
-    max_steps = 50
+    positions = np.zeros((max_steps, 2), dtype=np.int16)
+    steps = 0
     for step in range(max_steps):
         action = simulation_agent.choose_action(state)
-        next_state, reward, done, _ = simulation_env.step(action)
-        current_data["positions"].append(list(next_state))
-        state = next_state
+        state, reward, done, _ = simulation_env.step(action)
+        positions[step] = state
+        steps += 1
         
         if done:
             print(f"🎯 Goal reached in {step + 1} steps!")
             break
-        
-        time.sleep(0.3)
     
-    print("🏁 Simulation completed")
+    published = publish_trajectory(positions[:steps])
+    print(f"🏁 Simulation completed (trajectory v{published.version})")
 
 if __name__ == "__main__":
-    app.run(debug=True, threaded=True)
\ No newline at end of file
+    socketio.run(app, debug=True)
\ No newline at end of file
@@ -0,0 +1,238 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, CancelledError
+import numpy as np
+
+from grid_env import GridWorld
+from metrics import MetricsRecorder
+from RandomAgent import RandomAgent
+from MonteCarloAgent import MonteCarloAgent
+from QLearningAgent import QLearningAgent
+from PolicyIteration import PolicyIterationAgent
+from ValueIteration import ValueIterationAgent
+
+AGENT_CLASSES = {
+    "RandomAgent": RandomAgent,
+    "MonteCarloAgent": MonteCarloAgent,
+    "QLearningAgent": QLearningAgent,
+    "PolicyIterationAgent": PolicyIterationAgent,
+    "ValueIterationAgent": ValueIterationAgent
+}
+
+# Checkpoints des entraînements (un fichier par job)
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints")
+
+# Agents à boucles Python coûteuses: exécutés en processus pour ne pas être sérialisés par le GIL
+PROCESS_AGENTS = {"MonteCarloAgent", "QLearningAgent", "PolicyIterationAgent"}
+
+class QueueFull(Exception):
+    """Trop de jobs en attente ou en cours"""
+
+def seed_streams(seed):
+    """(générateur de la carte, générateur de l'agent), flux indépendants dérivés d'une graine.
+
+    Changer la carte ne décale pas les tirages de l'agent, et inversement.
+    """
+    layout, agent = np.random.SeedSequence(seed).spawn(2)
+    return np.random.default_rng(layout), np.random.default_rng(agent)
+
+def create_agent(agent_name, env, config):
+    agent_class = AGENT_CLASSES[agent_name]
+    # Graine de la config: même config -> même entraînement, quel que soit le worker
+    rng = seed_streams(config["seed"])[1] if config.get("seed") is not None else None
+    if agent_name == "QLearningAgent":
+        return agent_class(
+            env,
+            alpha=float(config.get("alpha", 0.1)),
+            gamma=float(config.get("gamma", 0.9)),
+            epsilon=float(config.get("epsilon", 0.1)),
+            rng=rng
+        )
+    elif agent_name in ["MonteCarloAgent", "PolicyIterationAgent"]:
+        return agent_class(env, gamma=float(config.get("gamma", 0.9)), rng=rng)
+    elif agent_name == "ValueIterationAgent":
+        return agent_class(env, gamma=float(config.get("gamma", 0.9)))
+    else:
+        return agent_class(env, rng=rng)
+
+def run_job(config, cancel_event=None, progress=None, checkpoint_path=None):
+    """Entraîne un agent selon config (exécuté dans un thread ou un processus worker).
+
+    Toutes les config["progress_every"] épisodes, l'épisode, l'erreur et le temps
+    écoulé sont écrits dans progress (dict, partagé via un Manager pour un
+    processus); l'entraînement s'arrête dès que cancel_event est levé. L'agent
+    entraîné est sauvegardé dans checkpoint_path si donné.
+    """
+    env = GridWorld(
+        size=config["size"],
+        goal_positions=config["goals"],
+        obstacles=config["obstacles"],
+        start_pos=(0, 0),
+        max_steps=100
+    )
+    agent = create_agent(config["agent"], env, config)
+
+    def on_progress(episode, error, elapsed):
+        if progress is not None:
+            progress.update(episode=episode + 1, error=float(error), elapsed=elapsed)
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+
+    metrics = MetricsRecorder()
+    start = time.time()
+    policy, _ = agent.train(episodes=config["episodes"], callback=on_progress,
+                            callback_every=config.get("progress_every", 10), metrics=metrics)
+    wall_time = time.time() - start
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+
+    checkpoint_hash = None
+    if checkpoint_path is not None:
+        os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+        checkpoint_hash = agent.save_checkpoint(checkpoint_path)
+
+    # Trajectoire gloutonne après entraînement (sans pause)
+    state = env.reset()
+    positions = []
+    for _ in range(50):
+        state, reward, done, _ = env.step(agent.choose_action(state))
+        positions.append([int(v) for v in state])
+        if done:
+            break
+
+    return {
+        "policy": None if policy is None else np.asarray(policy).tolist(),
+        "errors": metrics.history(config.get("max_error_points", 500)),
+        "positions": positions,
+        "wall_time": wall_time,
+        "checkpoint": checkpoint_path,
+        "model_id": os.path.basename(checkpoint_path)[:-len(".npz")] if checkpoint_path else None,
+        "checkpoint_hash": checkpoint_hash,
+    }
+
+class Job:
+    def __init__(self, config, cancel_event, progress):
+        self.id = uuid.uuid4().hex
+        self.config = config
+        self.cancel_event = cancel_event
+        self.progress = progress  # {"episode", "error", "elapsed"} mis à jour pendant l'entraînement
+        self.future = None
+        self.created = time.time()
+        self.finished = None
+        self.final_status = None  # "completed", "failed" ou "cancelled"
+        self.result = None
+        self.error = None
+
+    @property
+    def status(self):
+        if self.final_status is not None:
+            return self.final_status
+        if self.cancel_event.is_set():
+            return "cancelling"
+        return "running" if self.future.running() else "queued"
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "agent": self.config["agent"],
+            "episodes": self.config["episodes"],
+            "seed": self.config.get("seed"),
+            "created": self.created,
+            "finished": self.finished,
+            "progress": dict(self.progress),
+            "error": self.error,
+        }
+
+class JobManager:
+    """Exécute plusieurs entraînements en parallèle avec une file bornée.
+
+    Threads pour les agents peu coûteux ou vectorisés, processus pour les agents
+    limités par le GIL. Au-delà de max_pending jobs non terminés, submit() lève
+    QueueFull (backpressure). Seuls les max_finished derniers jobs terminés
+    sont conservés.
+    """
+
+    def __init__(self, max_threads=4, max_processes=None, max_pending=32, max_finished=100):
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.thread_pool = ThreadPoolExecutor(max_workers=max_threads)
+        self.max_processes = max_processes
+        self._process_pool = None
+        self._mp_manager = None
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _processes(self):
+        # Pool de processus et Manager (Events partagés) créés au premier job CPU
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_processes)
+            self._mp_manager = multiprocessing.Manager()
+        return self._process_pool
+
+    def submit(self, config):
+        with self._lock:
+            active = sum(1 for job in self.jobs.values() if job.final_status is None)
+            if active >= self.max_pending:
+                raise QueueFull(f"{active} jobs already queued or running")
+
+            if config["agent"] in PROCESS_AGENTS:
+                pool = self._processes()
+                job = Job(config, self._mp_manager.Event(), self._mp_manager.dict())
+            else:
+                pool = self.thread_pool
+                job = Job(config, threading.Event(), {})
+            self.jobs[job.id] = job
+            checkpoint_path = os.path.join(CHECKPOINT_DIR, f"{config['agent']}-{job.id}.npz")
+            job.future = pool.submit(run_job, config, job.cancel_event, job.progress, checkpoint_path)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def _finish(self, job, future):
+        with self._lock:
+            job.finished = time.time()
+            # Dernière progression figée en dict local (le proxy du Manager peut disparaître)
+            try:
+                job.progress = dict(job.progress)
+            except Exception:
+                job.progress = {}
+            try:
+                result = future.result()
+            except CancelledError:
+                job.final_status = "cancelled"
+            except Exception as e:
+                job.error = str(e)
+                job.final_status = "failed"
+            else:
+                if job.cancel_event.is_set():
+                    job.final_status = "cancelled"
+                else:
+                    job.result = result
+                    job.final_status = "completed"
+            self._evict()
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.final_status is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        # Un job encore en file est annulé immédiatement
+        job.future.cancel()
+        return job
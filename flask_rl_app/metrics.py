@@ -0,0 +1,103 @@
+import numpy as np
+
+class MetricsRecorder:
+    """Historique borné d'une métrique d'entraînement (erreur par épisode).
+
+    Les `capacity` dernières valeurs sont gardées telles quelles dans un buffer
+    circulaire float32. En parallèle, `levels` niveaux de sous-échantillonnage
+    (seaux de factor, factor**2, ... épisodes) gardent min / moyenne / max de
+    leurs `bucket_capacity` derniers seaux, chaque niveau étant alimenté par les
+    seaux complets du niveau inférieur. La mémoire ne dépend pas du nombre
+    d'épisodes.
+
+    S'utilise comme une liste pour les agents: append(), len() et [-1].
+    """
+
+    def __init__(self, capacity=4096, factor=10, levels=4, bucket_capacity=1024):
+        self.capacity = capacity
+        self.bucket_capacity = bucket_capacity
+        self.bucket_sizes = [factor ** (level + 1) for level in range(levels)]
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+        # buckets[niveau] = (min, moyenne, max) des seaux complets, en anneau
+        self.buckets = np.zeros((levels, 3, bucket_capacity), dtype=np.float32)
+        self.bucket_counts = [0] * levels
+        # Seau en cours par niveau: [min, somme, max, nombre d'épisodes]
+        self._partial = [self._empty_bucket() for _ in range(levels)]
+
+    @staticmethod
+    def _empty_bucket():
+        return [float("inf"), 0.0, float("-inf"), 0]
+
+    def append(self, value):
+        value = float(value)
+        self.values[self.count % self.capacity] = value
+        self.count += 1
+        if self.bucket_sizes:
+            self._accumulate(0, value, value, value, 1)
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def _accumulate(self, level, low, total, high, n):
+        partial = self._partial[level]
+        partial[0] = min(partial[0], low)
+        partial[1] += total
+        partial[2] = max(partial[2], high)
+        partial[3] += n
+        if partial[3] < self.bucket_sizes[level]:
+            return
+        i = self.bucket_counts[level] % self.bucket_capacity
+        self.buckets[level, :, i] = (partial[0], partial[1] / partial[3], partial[2])
+        self.bucket_counts[level] += 1
+        self._partial[level] = self._empty_bucket()
+        if level + 1 < len(self.bucket_sizes):
+            self._accumulate(level + 1, *partial)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not max(0, self.count - self.capacity) <= index < self.count:
+            raise IndexError("metric value no longer in the recent window")
+        return float(self.values[index % self.capacity])
+
+    def recent(self, n=None):
+        """Les n dernières valeurs brutes (au plus capacity), dans l'ordre"""
+        n = min(self.count, self.capacity, self.count if n is None else n)
+        return self.values[np.arange(self.count - n, self.count) % self.capacity]
+
+    def history(self, max_points=500):
+        """Historique complet à la résolution la plus fine tenant en max_points.
+
+        Renvoie un dict JSON-sérialisable: resolution (épisodes par point), start
+        (épisode du premier point), count (épisodes enregistrés) et les listes
+        min / mean / max. Le dernier point peut couvrir un seau incomplet. Si
+        même le niveau le plus grossier dépasse max_points, seuls ses points les
+        plus récents sont renvoyés.
+        """
+        if self.count <= min(max_points, self.capacity):
+            values = self.recent().tolist()
+            return {"resolution": 1, "start": 0, "count": self.count,
+                    "min": values, "mean": values, "max": values}
+
+        for level, size in enumerate(self.bucket_sizes):
+            complete = self.bucket_counts[level]
+            # Épisodes après le dernier seau complet: seaux en cours de ce niveau et des inférieurs
+            tail = self._partial[:level + 1]
+            has_tail = sum(p[3] for p in tail) > 0
+            if complete + has_tail <= max_points and complete <= self.bucket_capacity:
+                break
+
+        take = min(complete, self.bucket_capacity, max_points - has_tail)
+        indices = np.arange(complete - take, complete) % self.bucket_capacity
+        low, mean, high = (row.tolist() for row in self.buckets[level][:, indices])
+        if has_tail:
+            low.append(min(p[0] for p in tail))
+            mean.append(sum(p[1] for p in tail) / sum(p[3] for p in tail))
+            high.append(max(p[2] for p in tail))
+        return {"resolution": size, "start": (complete - take) * size, "count": self.count,
+                "min": low, "mean": mean, "max": high}
@@ -0,0 +1,158 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+from checkpoint import read_checkpoint
+from grid_env import GridWorld
+
+# Identifiant de modèle = nom du checkpoint sans .npz (pas de chemin)
+MODEL_ID_PATTERN = re.compile(r"^[\w-][\w.-]*$")
+
+class PolicyModel:
+    """Politique chargée depuis un checkpoint, interrogée par lots d'états.
+
+    Les tables restent projetées en mémoire (mmap): seules les lignes des
+    états demandés sont lues. Action = politique tabulaire si présente, sinon
+    argmax de Q. Pour les agents de planification (V seul), les Q-values sont
+    calculées à la demande via le modèle de l'environnement sauvegardé.
+    """
+
+    def __init__(self, model_id, arrays, meta):
+        self.model_id = model_id
+        self.meta = meta
+        self.size = meta["env"]["size"]
+        self.policy = arrays["policy"].reshape(-1) if "policy" in arrays else None
+        Q = arrays.get("Q")
+        self.Q = Q.reshape(self.size * self.size, -1) if Q is not None else None
+        self.V = arrays["V"].reshape(-1) if "V" in arrays else None
+        self.gamma = meta["hyperparameters"].get("gamma", 0.9)
+        self._model = None
+
+    def state_indices(self, states):
+        """(N, 2) positions [x, y] -> indices à plat y * size + x (ValueError si hors grille)"""
+        try:
+            states = np.asarray(states, dtype=np.int64)
+        except (TypeError, ValueError):
+            raise ValueError("states must be a list of [x, y] pairs")
+        if states.ndim != 2 or states.shape[1] != 2:
+            raise ValueError("states must be a list of [x, y] pairs")
+        if states.size and (states.min() < 0 or states.max() >= self.size):
+            raise ValueError(f"states must lie in [0, {self.size})")
+        return states[:, 1] * self.size + states[:, 0]
+
+    def q_values(self, indices):
+        if self.Q is not None:
+            return np.asarray(self.Q[indices], dtype=np.float32)
+        if self.V is None:
+            raise ValueError(f"Model {self.model_id} has neither Q nor V")
+        if self._model is None:
+            env = GridWorld(**self.meta["env"])
+            next_states, rewards, _ = env.transition_model()
+            self._model = (next_states, rewards)
+        next_states, rewards = self._model
+        # Seules les valeurs des successeurs demandés sont lues dans la projection
+        return (rewards[indices] + self.gamma * self.V[next_states[indices]]).astype(np.float32)
+
+    def actions(self, indices):
+        if self.policy is not None:
+            return np.asarray(self.policy[indices], dtype=np.int64)
+        return np.argmax(self.q_values(indices), axis=1)
+
+class ModelCache:
+    """Cache LRU des modèles chargés, indexés par identifiant de checkpoint"""
+
+    def __init__(self, directory, capacity=32):
+        self.directory = directory
+        self.capacity = capacity
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, model_id):
+        if not MODEL_ID_PATTERN.match(model_id):
+            raise KeyError(model_id)
+        return os.path.join(self.directory, model_id + ".npz")
+
+    def get(self, model_id):
+        with self._lock:
+            model = self._models.get(model_id)
+            if model is not None:
+                self._models.move_to_end(model_id)
+                return model
+        path = self.path(model_id)
+        if not os.path.exists(path):
+            raise KeyError(model_id)
+        # Chargement hors verrou: les requêtes sur d'autres modèles ne sont pas bloquées
+        model = PolicyModel(model_id, *read_checkpoint(path, mmap=True))
+        with self._lock:
+            self._models[model_id] = model
+            self._models.move_to_end(model_id)
+            while len(self._models) > self.capacity:
+                self._models.popitem(last=False)
+        return model
+
+    def available(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len(".npz")] for name in os.listdir(self.directory)
+                      if name.endswith(".npz") and not name.endswith(".tmp.npz"))
+
+    def loaded(self):
+        with self._lock:
+            return list(self._models)
+
+class LatencyHistogram:
+    """Histogramme des latences (secondes), seaux à bornes fixes en ms"""
+
+    BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+    def __init__(self, bounds_ms=BOUNDS_MS):
+        self.bounds = np.array(bounds_ms, dtype=float) / 1000.0
+        self.counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)  # dernier seau: au-delà
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        bucket = np.searchsorted(self.bounds, seconds)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += seconds
+
+    def time(self):
+        """Contexte qui mesure la durée du bloc"""
+        return _Timer(self)
+
+    def quantile(self, q, counts):
+        # Borne supérieure du seau contenant le quantile q (None au-delà de la dernière borne)
+        n = counts.sum()
+        if n == 0:
+            return None
+        bucket = int(np.searchsorted(np.cumsum(counts), q * n))
+        return float(self.bounds[bucket] * 1000.0) if bucket < len(self.bounds) else None
+
+    def to_dict(self):
+        with self._lock:
+            counts = self.counts.copy()
+            total = self.total
+        n = int(counts.sum())
+        labels = [f"le_{bound:g}ms" for bound in self.bounds * 1000.0] + ["inf"]
+        return {
+            "count": n,
+            "mean_ms": total / n * 1000.0 if n else None,
+            "p50_ms": self.quantile(0.5, counts),
+            "p99_ms": self.quantile(0.99, counts),
+            "buckets": dict(zip(labels, counts.tolist())),
+        }
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.start)
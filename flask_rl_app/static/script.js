@@ -14,9 +14,15 @@ class RLGridWorld {
         this.simulationRunning = false;
         this.simulationSpeed = 200;
         this.currentData = null;
+
+        // Lecture de la trajectoire: le serveur l'envoie d'un bloc, le rythme est appliqué ici
+        this.trajectory = [];
+        this.trajectoryVersion = null;
+        this.playbackStep = 0;
+        this.playbackTimer = null;
         
         this.initializeEventListeners();
-        this.startDataPolling();
+        this.startDataStream();
         this.setupCanvasStyles();
     }
 
@@ -72,6 +78,7 @@ class RLGridWorld {
         data.alpha = parseFloat(data.alpha);
         data.gamma = parseFloat(data.gamma);
         data.epsilon = parseFloat(data.epsilon);
+        data.incremental = data.incremental === 'on';
 
         try {
             const response = await fetch('/start_training', {
@@ -116,6 +123,72 @@ class RLGridWorld {
         this.simulationSpeed = 500 - (speed * 45);
     }
 
+    startDataStream() {
+        if (typeof io === 'undefined') {
+            // Client Socket.IO indisponible: repli sur le polling de /data
+            console.warn('Socket.IO client not loaded; falling back to polling /data');
+            this.startDataPolling();
+            return;
+        }
+        this.socket = io();
+        this.socket.on('snapshot', (data) => this.applySnapshot(data));
+        this.socket.on('telemetry', (delta) => this.applyDelta(delta));
+    }
+
+    applySnapshot(data) {
+        this.currentData = data;
+        const trajectory = { version: data.trajectory_version, positions: data.positions || [] };
+        if (trajectory.version !== this.trajectoryVersion) {
+            this.playTrajectory(trajectory);
+        } else {
+            // Même trajectoire: garder l'avancement de l'animation en cours
+            this.currentData.positions = this.trajectory.slice(0, this.playbackStep);
+        }
+        this.updateDisplay();
+    }
+
+    playTrajectory(trajectory) {
+        this.trajectoryVersion = trajectory.version;
+        this.trajectory = trajectory.positions;
+        this.playbackStep = 0;
+        this.currentData.positions = [];
+        this.simulationRunning = this.trajectory.length > 0;
+        this.scheduleFrame();
+    }
+
+    scheduleFrame() {
+        clearTimeout(this.playbackTimer);
+        if (!this.simulationRunning || this.playbackStep >= this.trajectory.length) return;
+        this.playbackTimer = setTimeout(() => {
+            this.playbackStep += 1;
+            this.currentData.positions = this.trajectory.slice(0, this.playbackStep);
+            this.updateDisplay();
+            this.scheduleFrame();
+        }, this.simulationSpeed);
+    }
+
+    applyDelta(delta) {
+        if (!this.currentData) return;
+
+        // Nouvelle trajectoire complète (immuable, versionnée)
+        if (delta.trajectory && delta.trajectory.version !== this.trajectoryVersion) {
+            this.playTrajectory(delta.trajectory);
+        }
+
+        // Historique des erreurs sous-échantillonné: remplace la courbe entière
+        if (delta.error_history) {
+            this.currentData.errors = delta.error_history.mean;
+        }
+
+        // Compteurs (épisode courant, fin d'entraînement, historique, ...)
+        for (const [key, value] of Object.entries(delta)) {
+            if (key !== 'trajectory') {
+                this.currentData[key] = value;
+            }
+        }
+        this.updateDisplay();
+    }
+
     startDataPolling() {
         setInterval(() => {
             this.fetchData();
@@ -125,8 +198,7 @@ class RLGridWorld {
     async fetchData() {
         try {
             const response = await fetch('/data');
-            this.currentData = await response.json();
-            this.updateDisplay();
+            this.applySnapshot(await response.json());
         } catch (error) {
             console.error('Error fetching data:', error);
         }
@@ -518,12 +590,18 @@ class RLGridWorld {
     }
 
     startSimulation() {
+        // Rejouer depuis le début si l'animation était terminée
+        if (this.playbackStep >= this.trajectory.length) {
+            this.playbackStep = 0;
+        }
         this.simulationRunning = true;
+        this.scheduleFrame();
         this.updateTrainingStatus('Simulation running', 'training');
     }
 
     pauseSimulation() {
         this.simulationRunning = false;
+        clearTimeout(this.playbackTimer);
         this.updateTrainingStatus('Simulation paused', 'ready');
     }
 
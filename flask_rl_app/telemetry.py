@@ -0,0 +1,51 @@
+import threading
+
+class TelemetryStream:
+    """Pousse les mises à jour d'entraînement aux clients Socket.IO sous forme de deltas.
+
+    Les producteurs (thread d'entraînement, simulation) appellent push(); les deltas
+    sont regroupés et émis au plus max_fps fois par seconde par une tâche de fond,
+    si bien que le coût par client ne dépend pas de la durée de l'entraînement.
+    Un delta ne porte que des valeurs complètes (compteurs, historique
+    sous-échantillonné des erreurs, trajectoire versionnée): l'appliquer deux
+    fois ne change rien.
+    """
+
+    def __init__(self, socketio, event="telemetry", max_fps=10):
+        self.socketio = socketio
+        self.event = event
+        self.interval = 1.0 / max_fps
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = {}
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = self.socketio.start_background_task(self._run)
+
+    def push(self, **values):
+        """Met à jour des valeurs (la dernière valeur de chaque clé l'emporte)"""
+        with self._lock:
+            self._pending.update(values)
+        self._wake.set()
+
+    def clear(self):
+        """Abandonne les valeurs en attente (nouvel entraînement, nouvelle simulation)"""
+        with self._lock:
+            self._pending = {}
+
+    def _take(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending or None
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            delta = self._take()
+            if delta is not None:
+                self.socketio.emit(self.event, delta)
+            # Cadence maximale: les push() pendant cette pause sont regroupés
+            self.socketio.sleep(self.interval)
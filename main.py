@@ -1,5 +1,7 @@
 import sys
 import os
+import time
+import uuid
 import numpy as np
 from envs.grid_env import GridWorld
 from agents.random_agent import RandomAgent
@@ -16,8 +18,10 @@ def run_agent(env, agent, agent_name, train_needed=True, episodes=1000):
         # Train et récupérer policy + erreurs
         policy, errors = run_training_with_plot(env, agent, episodes=episodes, render_env=False)
         print(f"Policy learned for {agent_name}:\n{policy}")
-        # Sauvegarder la table de l’agent
-        agent.save_table()
+        # Sauvegarder l’agent (tables, env et hyperparamètres) dans un checkpoint par run
+        os.makedirs("checkpoints", exist_ok=True)
+        filename = f"{agent_name}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.npz"
+        agent.save_checkpoint(os.path.join("checkpoints", filename))
     else:
         # Pour RandomAgent ou agents sans train
         run_simulation(env, agent)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from envs.grid_env import GridWorld
+from agents.checkpoint import compact
+from agents.dyna_agent import DynaQAgent
+
+def test_compact_keeps_original_dtype_when_float32_flips_argmax():
+    # Écart sous la précision float32: les deux actions deviennent égales
+    Q = np.array([[1.0, 1.0 + 1e-12], [5.0001, 5.0002]])
+    stored = compact(Q, keep_argmax=True)
+    assert stored.dtype == np.float64
+    assert np.array_equal(np.argmax(stored, axis=-1), np.argmax(Q, axis=-1))
+
+def test_greedy_actions_survive_checkpoint_round_trip(tmp_path):
+    env = GridWorld(size=8)
+    agent = DynaQAgent(env, rng=0)
+    agent.train(episodes=50)
+    # Quasi-égalités sur quelques états: float16 et float32 changeraient l'argmax
+    Q = agent.Q.reshape(-1, env.action_space.n)
+    Q[:4, 1] = Q[:4, 0] + 1e-12
+    path = str(tmp_path / "dyna.npz")
+    agent.save_checkpoint(path)
+
+    loaded = DynaQAgent(GridWorld(size=8), rng=1)
+    loaded.load_checkpoint(path)
+    assert np.array_equal(np.argmax(loaded.Q, axis=-1), np.argmax(agent.Q, axis=-1))
+
+    served = DynaQAgent(GridWorld(size=8), rng=1)
+    served.load_checkpoint(path, mmap=True)
+    assert np.array_equal(np.argmax(served.Q, axis=-1), np.argmax(agent.Q, axis=-1))
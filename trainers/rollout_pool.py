@@ -0,0 +1,198 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from envs.grid_env import GridWorld
+
+# Modèle tabulaire de l'environnement, construit une fois par processus worker
+_worker_model = None
+
+def env_config(env):
+    """Configuration picklable d'un GridWorld (taille, départ, goals, obstacles)"""
+    return {
+        "size": env.size,
+        "start_pos": tuple(int(v) for v in env.start_pos),
+        "goal_positions": [tuple(int(v) for v in goal) for goal in env.goal_positions],
+        "obstacles": [tuple(int(v) for v in obs) for obs in env.obstacles],
+        "max_steps": env.max_steps,
+    }
+
+def _init_worker(config):
+    global _worker_model
+    env = GridWorld(**config)
+    next_states, rewards, dones = env.transition_model()
+    # Listes Python: accès scalaire plus rapide que l'indexation NumPy dans la boucle
+    _worker_model = (next_states.tolist(), rewards.tolist(), dones.tolist(), next_states.shape[1],
+                     int(env.state_index(env.start_pos)), env.max_steps)
+
+def _greedy_actions(table):
+    return (np.argmax(table, axis=1) if table.ndim == 2 else table).tolist()
+
+def _rollout_worker(shm_name, shape, dtype, n_episodes, epsilon, gamma, seed):
+    """Génère n_episodes avec un RNG indépendant; renvoie (states, actions, returns, lengths)"""
+    next_states, rewards, dones, n_actions, start, max_steps = _worker_model
+
+    # Politique gloutonne lue depuis la mémoire partagée (Q (S, A) ou politique (S,))
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        greedy = _greedy_actions(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+    finally:
+        shm.close()
+
+    rng = np.random.default_rng(seed)
+    states = np.zeros(n_episodes * max_steps, dtype=np.int32)
+    actions = np.zeros(n_episodes * max_steps, dtype=np.int8)
+    returns = np.zeros(n_episodes * max_steps, dtype=np.float32)
+    lengths = np.zeros(n_episodes, dtype=np.int32)
+    episode_rewards = np.zeros(max_steps)
+
+    pos = 0
+    for ep in range(n_episodes):
+        # Tirages aléatoires de l'épisode en un seul bloc
+        explore = (rng.random(max_steps) < epsilon).tolist()
+        random_actions = rng.integers(n_actions, size=max_steps).tolist()
+        s = start
+        t = 0
+        done = False
+        while not done:
+            a = random_actions[t] if explore[t] else greedy[s]
+            states[pos + t] = s
+            actions[pos + t] = a
+            episode_rewards[t] = rewards[s][a]
+            done = dones[s][a]
+            s = next_states[s][a]
+            t += 1
+            done = done or t >= max_steps
+
+        G = 0.0
+        for i in range(t - 1, -1, -1):
+            G = gamma * G + episode_rewards[i]
+            returns[pos + i] = G
+        lengths[ep] = t
+        pos += t
+
+    return states[:pos], actions[:pos], returns[:pos], lengths
+
+class RolloutPool:
+    """Pool de processus qui génère des épisodes en parallèle.
+
+    La configuration de l'environnement est envoyée une fois à chaque worker;
+    la table (Q ou politique) est partagée via multiprocessing.shared_memory.
+    Chaque lot d'épisodes utilise un flux RNG indépendant (SeedSequence.spawn).
+    """
+
+    def __init__(self, env, num_workers=None, seed=None):
+        self.num_workers = num_workers or os.cpu_count()
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.num_workers, initializer=_init_worker, initargs=(env_config(env),)
+        )
+        self._shm = None
+        self._shape = None
+        self._dtype = None
+
+    def set_table(self, table):
+        """Copie la table courante (Q (S, A) ou politique (S,)) en mémoire partagée"""
+        table = np.ascontiguousarray(table)
+        if self._shm is None or self._shape != table.shape or self._dtype != table.dtype:
+            self._release()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(table.nbytes, 1))
+            self._shape = table.shape
+            self._dtype = table.dtype
+        np.ndarray(table.shape, dtype=table.dtype, buffer=self._shm.buf)[:] = table
+
+    def collect(self, n_episodes, epsilon=1.0, gamma=0.9):
+        """Génère n_episodes répartis sur les workers.
+
+        Renvoie (states, actions, returns, lengths) concaténés, les états étant
+        des indices à plat y * size + x.
+        """
+        if self._shm is None:
+            raise RuntimeError("set_table() must be called before collect()")
+        chunks = np.array_split(np.arange(n_episodes), self.num_workers)
+        seeds = self.seed_sequence.spawn(len(chunks))
+        futures = [
+            self.executor.submit(_rollout_worker, self._shm.name, self._shape, self._dtype,
+                                 len(chunk), epsilon, gamma, seed)
+            for chunk, seed in zip(chunks, seeds) if len(chunk)
+        ]
+        results = [future.result() for future in futures]
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def close(self):
+        self.executor.shutdown()
+        self._release()
+
+    def _release(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def train_monte_carlo(agent, episodes=1000, pool=None, batch_episodes=256, epsilon=1.0, callback=None):
+    """Entraîne un MonteCarloAgent avec des épisodes générés en parallèle.
+
+    Les workers jouent epsilon-greedy par rapport au Q courant (epsilon=1.0:
+    aléatoire, comme MonteCarloAgent.generate_episode); l'agrégation se fait
+    dans l'agent via update_from_returns. Une erreur par lot, et un appel
+    callback(épisodes terminés, erreur, secondes) par lot (False arrête).
+    """
+    own_pool = pool is None
+    pool = pool or RolloutPool(agent.env)
+    n_actions = agent.env.action_space.n
+    policy = np.argmax(agent.Q.reshape(-1, n_actions), axis=1)
+    errors = []
+    start = time.time()
+    try:
+        done_episodes = 0
+        while done_episodes < episodes:
+            batch = min(batch_episodes, episodes - done_episodes)
+            pool.set_table(agent.Q.reshape(-1, n_actions))
+            states, actions, returns, lengths = pool.collect(batch, epsilon=epsilon, gamma=agent.gamma)
+            episode_ids = np.repeat(np.arange(len(lengths)), lengths)
+            agent.update_from_returns(states.astype(np.int64), actions.astype(np.int64),
+                                      returns.astype(np.float64), episode_ids)
+
+            current_policy = np.argmax(agent.Q.reshape(-1, n_actions), axis=1)
+            errors.append(np.mean(np.abs(current_policy - policy)))
+            policy = current_policy
+            done_episodes += batch
+            if callback is not None and callback(done_episodes, errors[-1], time.time() - start) is False:
+                break
+    finally:
+        if own_pool:
+            pool.close()
+    return policy.reshape(agent.Q.shape[:-1]), errors
+
+def evaluate_policy(env, table, episodes=1000, pool=None, gamma=1.0):
+    """Retour moyen de la politique gloutonne (Q ou politique) sur `episodes` épisodes"""
+    own_pool = pool is None
+    pool = pool or RolloutPool(env)
+    try:
+        start = time.time()
+        # Q: forme de l'env (grille (size, size) ou flat_states (S,)) + axe des actions
+        shape = env.table_shape()
+        if table.ndim == len(shape) + 1 and table.shape[:len(shape)] == shape:
+            pool.set_table(table.reshape(env.size * env.size, -1))
+        else:
+            pool.set_table(table.reshape(-1).astype(np.int64))
+        _, _, returns, lengths = pool.collect(episodes, epsilon=0.0, gamma=gamma)
+        # Retour de chaque épisode = retour au premier pas
+        first_steps = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        episode_returns = returns[first_steps]
+    finally:
+        if own_pool:
+            pool.close()
+    return {
+        "mean_return": float(np.mean(episode_returns)),
+        "mean_length": float(np.mean(lengths)),
+        "episodes": episodes,
+        "wall_time": time.time() - start,
+    }
@@ -0,0 +1,217 @@
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from envs.grid_env import GridWorld
+from agents.random_agent import RandomAgent
+from agents.MonteCarloAgent import MonteCarloAgent
+from agents.PolicyIteration import PolicyIterationAgent
+from agents.QLearningAgent import QLearningAgent
+from agents.value_agents import ValueIterationAgent
+from agents.td_agents import SarsaAgent, ExpectedSarsaAgent, NStepSarsaAgent, SarsaLambdaAgent, QLambdaAgent
+from agents.dyna_agent import DynaQAgent
+from agents.random_stream import spawn_rngs
+
+AGENT_CLASSES = {
+    "RandomAgent": RandomAgent,
+    "MonteCarloAgent": MonteCarloAgent,
+    "PolicyIterationAgent": PolicyIterationAgent,
+    "QLearningAgent": QLearningAgent,
+    "ValueIterationAgent": ValueIterationAgent,
+    "SarsaAgent": SarsaAgent,
+    "ExpectedSarsaAgent": ExpectedSarsaAgent,
+    "NStepSarsaAgent": NStepSarsaAgent,
+    "SarsaLambdaAgent": SarsaLambdaAgent,
+    "QLambdaAgent": QLambdaAgent,
+    "DynaQAgent": DynaQAgent,
+}
+
+# Colonnes du fichier de résultats (une valeur par essai)
+PARAM_COLUMNS = ["agent", "alpha", "gamma", "epsilon", "size", "obstacle_density", "episodes", "seed"]
+RESULT_COLUMNS = ["final_return", "convergence_episode", "wall_time"]
+
+DEFAULTS = {"alpha": 0.1, "gamma": 0.9, "epsilon": 0.1, "size": 6, "obstacle_density": 0.1,
+            "episodes": 1000}
+
+def grid_trials(space, base_seed=0):
+    """Produit cartésien d'un espace {paramètre: [valeurs]} -> liste d'essais"""
+    keys = sorted(space)
+    combos = itertools.product(*(space[key] for key in keys))
+    return _with_seeds([dict(zip(keys, combo)) for combo in combos], base_seed)
+
+def random_trials(space, n_trials, base_seed=0):
+    """n_trials tirages uniformes dans {paramètre: [valeurs]} ou {paramètre: (min, max)}"""
+    rng = np.random.default_rng(base_seed)
+    trials = []
+    for _ in range(n_trials):
+        trial = {}
+        for key in sorted(space):
+            values = space[key]
+            if isinstance(values, tuple):
+                low, high = values
+                trial[key] = int(rng.integers(low, high + 1)) if isinstance(low, int) else float(rng.uniform(low, high))
+            else:
+                trial[key] = values[rng.integers(len(values))]
+        trials.append(trial)
+    return _with_seeds(trials, base_seed)
+
+def _with_seeds(trials, base_seed):
+    # Graine déterministe par essai, indépendante de l'ordre d'exécution
+    for index, trial in enumerate(trials):
+        for key, value in DEFAULTS.items():
+            trial.setdefault(key, value)
+        if "seed" not in trial:
+            trial["seed"] = int(np.random.SeedSequence([base_seed, index]).generate_state(1)[0])
+    return trials
+
+def trial_id(trial):
+    """Identifiant stable d'un essai (hash de ses paramètres), utilisé pour la reprise"""
+    payload = json.dumps({key: trial[key] for key in PARAM_COLUMNS}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+def make_env(size, obstacle_density, rng, max_steps=None):
+    """GridWorld size x size: départ (0, 0), goal au coin opposé, obstacles aléatoires"""
+    start, goal = 0, size * size - 1
+    free_cells = np.setdiff1d(np.arange(size * size), [start, goal])
+    n_obstacles = int(round(obstacle_density * len(free_cells)))
+    cells = rng.choice(free_cells, size=n_obstacles, replace=False)
+    obstacles = [(int(c % size), int(c // size)) for c in cells]
+    return GridWorld(size=size, start_pos=(0, 0), goal_positions=[(size - 1, size - 1)],
+                     obstacles=obstacles, max_steps=max_steps or 4 * size)
+
+def greedy_return(env, policy):
+    """Retour (non actualisé) d'un épisode avec la politique tabulaire (size, size)"""
+    next_states, rewards, dones = env.transition_model()
+    policy = np.asarray(policy, dtype=int).reshape(-1)
+    s = env.state_index(env.start_pos)
+    total = 0.0
+    for _ in range(env.max_steps):
+        a = policy[s]
+        total += rewards[s, a]
+        if dones[s, a]:
+            break
+        s = next_states[s, a]
+    return total
+
+def convergence_episode(errors, tol=1e-3):
+    """Premier épisode à partir duquel toutes les erreurs restent sous tol (-1 sinon)"""
+    errors = np.asarray(errors, dtype=float)
+    above = np.flatnonzero(~(errors < tol))
+    if above.size == 0:
+        return 0 if len(errors) else -1
+    return -1 if above[-1] == len(errors) - 1 else int(above[-1] + 1)
+
+def run_trial(trial):
+    """Exécute un essai (dans un processus worker) et renvoie paramètres + résultats"""
+    # Flux indépendants pour la carte et pour l'agent, dérivés de la graine de l'essai
+    env_rng, agent_rng = spawn_rngs(trial["seed"], 2)
+    env = make_env(trial["size"], trial["obstacle_density"], env_rng)
+
+    agent_class = AGENT_CLASSES[trial["agent"]]
+    accepted = inspect.signature(agent_class.__init__).parameters
+    kwargs = {key: trial[key] for key in ("alpha", "gamma", "epsilon") if key in accepted}
+    if "rng" in accepted:
+        kwargs["rng"] = agent_rng
+    agent = agent_class(env, **kwargs)
+
+    start = time.time()
+    policy, errors = agent.train(episodes=trial["episodes"])
+    wall_time = time.time() - start
+
+    result = {key: trial[key] for key in PARAM_COLUMNS}
+    result.update({
+        "final_return": float(greedy_return(env, policy)) if policy is not None else float("nan"),
+        "convergence_episode": convergence_episode(errors),
+        "wall_time": wall_time,
+    })
+    return result
+
+def load_journal(journal_path):
+    """Résultats déjà écrits (une ligne JSON par essai terminé), indexés par trial_id"""
+    done = {}
+    if os.path.exists(journal_path):
+        with open(journal_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # dernière ligne tronquée par un crash
+                done[record["trial_id"]] = record
+    return done
+
+def write_columns(records, path):
+    """Écrit les résultats en colonnes (un tableau NumPy par colonne) dans un .npz"""
+    columns = {}
+    for key in ["trial_id"] + PARAM_COLUMNS + RESULT_COLUMNS:
+        values = [record[key] for record in records]
+        columns[key] = np.array(values, dtype=str) if key in ("trial_id", "agent") else np.array(values)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **columns)
+    os.replace(tmp_path, path)
+
+def run_sweep(trials, out_dir="sweep_results", num_workers=None):
+    """Lance tous les essais sur un pool de processus, avec reprise après crash.
+
+    Chaque essai terminé est ajouté à out_dir/trials.jsonl (journal de reprise);
+    les essais déjà présents sont sautés. Le résultat final est écrit en
+    colonnes dans out_dir/results.npz.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    journal_path = os.path.join(out_dir, "trials.jsonl")
+    done = load_journal(journal_path)
+    pending = [trial for trial in trials if trial_id(trial) not in done]
+    print(f"Sweep: {len(trials)} trials, {len(trials) - len(pending)} already done")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor, open(journal_path, "a") as journal:
+            if journal.tell() > 0:
+                journal.write("\n")  # isoler une éventuelle ligne tronquée
+            futures = {executor.submit(run_trial, trial): trial for trial in pending}
+            for future in as_completed(futures):
+                trial = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    print(f"Trial {trial} failed: {e}")
+                    continue
+                record["trial_id"] = trial_id(trial)
+                journal.write(json.dumps(record) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+                done[record["trial_id"]] = record
+                print(f"[{len(done)}/{len(trials)}] {record['agent']}: "
+                      f"return={record['final_return']:.2f}, time={record['wall_time']:.2f}s")
+
+    records = [done[trial_id(trial)] for trial in trials if trial_id(trial) in done]
+    write_columns(records, os.path.join(out_dir, "results.npz"))
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep over GridWorld agents")
+    parser.add_argument("space", help='JSON file: {parameter: [values]} (or {"min": a, "max": b} with --random)')
+    parser.add_argument("--random", type=int, default=0, help="number of random samples instead of a grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="sweep_results")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.space) as f:
+        space = json.load(f)
+    if args.random:
+        # {"min": a, "max": b} -> intervalle continu (ou entier si a et b sont entiers)
+        space = {key: (value["min"], value["max"]) if isinstance(value, dict) else value
+                 for key, value in space.items()}
+        trials = random_trials(space, args.random, base_seed=args.seed)
+    else:
+        trials = grid_trials(space, base_seed=args.seed)
+    run_sweep(trials, out_dir=args.out, num_workers=args.workers)
+
+if __name__ == "__main__":
+    main()